@@ -0,0 +1,204 @@
+"""
+Headless agent pipeline: ingestion, Analyzer, Planner, Coder and repair.
+
+Nothing here touches Streamlit. Every agent takes `llm_call(prompt) -> response`
+so the caller decides how the model is reached (the real model in app4.py, a
+fake one in the load test, both through `shared_invoke`).
+"""
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import CancelledError
+
+from code_blocks import changed_files
+from prompts import (
+    ANALYZER_PROMPT, CODER_PROMPT, DEEPDIVE_PROMPT, PLANNER_PROMPT, REPAIR_PROMPT, render_context,
+)
+from repo_filter import RepoFilter
+from repo_tree import describe_exclusions, encode_tree, walk_tree
+from singleflight import LLM_CALLS, SUMMARIES, TREE_FETCHES, request_key
+from summary_store import summarize_repo
+
+IngestLimits = namedtuple("IngestLimits", ["max_depth", "max_chars", "max_file_size", "summary_max_files"])
+
+
+# ---------------------------
+# Ingestion
+# ---------------------------
+def head_tree_sha(repo):
+    """
+    Root tree SHA of the default branch tip: identifies the content being
+    ingested, whoever fetches it.
+    """
+    return repo.get_branch(repo.default_branch).commit.commit.tree.sha
+
+
+def walk_repo(repo, limits, cancel=None, tree_sha=None):
+    """
+    Lists the repo (at `tree_sha` if given) without any LLM calls.
+    Returns (entries, repo_tree).
+    """
+    repo_filter = RepoFilter(max_file_size=limits.max_file_size)
+    entries, report = walk_tree(repo, repo_filter, cancel=cancel, root=tree_sha)
+    repo_tree = encode_tree(entries, max_depth=limits.max_depth, max_chars=limits.max_chars)
+    exclusions = describe_exclusions(report)
+    if exclusions:
+        repo_tree = f"{repo_tree}\n{exclusions}"
+    return entries, repo_tree
+
+
+def summarize_key_files(repo, entries, llm_call, store, limits, cancel=None):
+    """
+    Digest of one-line summaries for the key files in `entries` ("" when off).
+    """
+    if not limits.summary_max_files:
+        return ""
+    return summarize_repo(repo, entries, llm_call, store, max_files=limits.summary_max_files, cancel=cancel)
+
+
+def ingest_repo(repo, llm_call, store, limits, cancel=None, tree_sha=None):
+    """
+    Walks the repo and summarizes its key files. Returns (repo_tree, repo_digest).
+    """
+    entries, repo_tree = walk_repo(repo, limits, cancel, tree_sha)
+    return repo_tree, summarize_key_files(repo, entries, llm_call, store, limits, cancel)
+
+
+def _shared(flight, key, cancel, fn, *args):
+    while True:
+        try:
+            return flight.do(key, fn, *args)
+        except CancelledError:
+            if cancel is not None and cancel.is_set():
+                raise
+            # We joined another session's prefetch that got cancelled; run it ourselves
+
+
+def shared_walk(repo, limits, cancel=None):
+    """
+    `walk_repo` coalesced across sessions. `repo` is opened with the caller's
+    own token, so access is checked per caller (`get_repo` plus one branch
+    lookup); callers then share one walk per repo, head tree and limits,
+    whatever token they used. Returns (tree_sha, entries, repo_tree).
+    """
+    tree_sha = head_tree_sha(repo)
+    key = request_key(repo.full_name, tree_sha, limits.max_depth, limits.max_chars, limits.max_file_size)
+    entries, repo_tree = _shared(TREE_FETCHES, key, cancel, walk_repo, repo, limits, cancel, tree_sha)
+    return tree_sha, entries, repo_tree
+
+
+def shared_digest(repo, tree_sha, entries, llm_call, store, limits, cancel=None):
+    """
+    `summarize_key_files` coalesced like `shared_walk`, so sessions arriving
+    together don't each download and summarize the files the store lacks.
+    """
+    key = request_key(repo.full_name, tree_sha, limits)
+    return _shared(SUMMARIES, key, cancel, summarize_key_files, repo, entries, llm_call, store, limits, cancel)
+
+
+def shared_ingest(repo, llm_call, store, limits, cancel=None):
+    """
+    `ingest_repo` through `shared_walk` and `shared_digest`. Returns (repo_tree, repo_digest).
+    """
+    tree_sha, entries, repo_tree = shared_walk(repo, limits, cancel)
+    return repo_tree, shared_digest(repo, tree_sha, entries, llm_call, store, limits, cancel)
+
+
+def prefetch_walk(open_repo, limits, cancel=None):
+    """
+    The speculative part of ingestion, run before the user asks for it:
+    `shared_walk` of the repo returned by `open_repo()`, no LLM calls.
+    Returns (repo, tree_sha, entries, repo_tree).
+    """
+    repo = open_repo()
+    return (repo, *shared_walk(repo, limits, cancel))
+
+
+def ingest_prefetched(prefetch, open_repo, llm_call, store, limits):
+    """
+    `shared_ingest`, reusing `prefetch` (a future of `prefetch_walk`, or None)
+    if it succeeded and the default branch hasn't moved since.
+    Returns (repo_tree, repo_digest).
+    """
+    try:
+        prefetched = prefetch.result() if prefetch is not None else None
+    except Exception:
+        # Failed or cancelled; ingest from scratch
+        prefetched = None
+    if prefetched:
+        repo, tree_sha, entries, repo_tree = prefetched
+        if tree_sha == head_tree_sha(repo):
+            return repo_tree, shared_digest(repo, tree_sha, entries, llm_call, store, limits)
+    return shared_ingest(open_repo(), llm_call, store, limits)
+
+
+# ---------------------------
+# Model Calls
+# ---------------------------
+def shared_invoke(llm, model, prompt, stats):
+    """
+    Calls `llm`; identical prompts already in flight from other sessions are
+    shared. Every caller records the response on its own `stats`, so sessions
+    that joined a shared call see it too.
+    """
+    started = time.perf_counter()
+    response = LLM_CALLS.do(request_key(model, prompt), llm.invoke, prompt)
+    stats.record(response, time.perf_counter() - started)
+    return response
+
+
+# ---------------------------
+# Agents
+# ---------------------------
+def analyze(llm_call, repo_link, repo_tree, repo_digest):
+    context = render_context(repo_link, repo_tree=repo_tree, repo_digest=repo_digest)
+    return llm_call(ANALYZER_PROMPT.render(context)).content
+
+
+def deep_dive(llm_call, repo_link, repo_tree, repo_digest):
+    context = render_context(repo_link, repo_tree=repo_tree, repo_digest=repo_digest)
+    return llm_call(DEEPDIVE_PROMPT.render(context)).content
+
+
+def planner_context(repo_link, repo_summary, detailed_summary):
+    """
+    Shared prefix for the Planner and Coder prompts, byte-identical across calls.
+    """
+    return render_context(repo_link, repo_summary=repo_summary, detailed_summary=detailed_summary)
+
+
+def plan(llm_call, context, instruction):
+    return llm_call(PLANNER_PROMPT.render(context, user_instruction=instruction)).content
+
+
+def code(llm_call, context, implementation_plan):
+    return llm_call(CODER_PROMPT.render(context, implementation_plan=implementation_plan)).content
+
+
+def repair(llm_call, context, implementation_plan, previous_code, validation_errors):
+    prompt = REPAIR_PROMPT.render(
+        context,
+        implementation_plan=implementation_plan,
+        previous_code=previous_code,
+        validation_errors=validation_errors,
+    )
+    return llm_call(prompt).content
+
+
+# ---------------------------
+# Generated Files
+# ---------------------------
+def generated_files(code_output):
+    """
+    Maps path -> content for each file in the Coder output. Output without
+    recognizable files is kept as a single text file.
+    """
+    return changed_files(code_output) or {"ai_generated_changes.txt": code_output}
+
+
+def write_files(root, files):
+    for path, content in files.items():
+        full_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(content)
@@ -1,9 +1,21 @@
 import streamlit as st
-from langchain_xai import ChatXAI
 from dotenv import load_dotenv
-from github import Github
+import agents
+from agents import IngestLimits
+from prompts import PromptCacheStats
+import os
+import re
+import threading
 import time
 import itertools
+from concurrent.futures import ThreadPoolExecutor
+from code_blocks import language_for, parse_code_blocks, prose
+from git_plumbing import auth_env, commit_and_push, mirror_for
+from repo_filter import DEFAULT_MAX_FILE_SIZE
+from repo_tree import parse_repo_link
+from singleflight import LLM_CALLS, SUMMARIES, TREE_FETCHES, request_key
+from summary_store import SummaryStore
+from validation import CHECK_TIMEOUT, format_report, missing_paths, validate_changes
 
 # ---------------------------
 # Environment setup
@@ -13,100 +25,207 @@ load_dotenv()
 # ---------------------------
 # Session State Handling
 # ---------------------------
-for key in ["repo_summary", "detailed_summary", "plan", "code_output"]:
+for key in [
+    "repo_summary", "detailed_summary", "plan", "code_output", "validation_report",
+    "repo_context", "prefetch", "deepdive_job",
+]:
     if key not in st.session_state:
         st.session_state[key] = None
+if "prompt_stats" not in st.session_state:
+    st.session_state.prompt_stats = PromptCacheStats()
 
 # ---------------------------
 # LLM Setup (Hugging Face)
 # ---------------------------
 
-llm = ChatXAI(model='grok-4-fast-reasoning')
+LLM_MODEL = 'grok-4-fast-reasoning'
+
+@st.cache_resource
+def get_llm():
+    """
+    Created on the first model call, so the page renders without loading the SDK.
+    """
+    from langchain_xai import ChatXAI
+    return ChatXAI(model=LLM_MODEL)
+
+def llm_invoke(prompt, stats=None):
+    """
+    Calls the model; identical prompts already in flight from other sessions are shared.
+    Pass `stats` explicitly when calling from a worker thread.
+    """
+    stats = st.session_state.prompt_stats if stats is None else stats
+    return agents.shared_invoke(get_llm(), LLM_MODEL, prompt, stats)
 
 # ---------------------------
 # Utility: Fetch Repo Structure
 # ---------------------------
+# Directories nested deeper than this are shown as file counts (unset = no limit)
+TREE_MAX_DEPTH = int(os.environ["TREE_MAX_DEPTH"]) if os.environ.get("TREE_MAX_DEPTH") else None
+# Rough prompt budget for the encoded tree (~4 characters per token)
+TREE_MAX_CHARS = int(os.environ.get("TREE_MAX_CHARS", "60000"))
+# Files larger than this (bytes) are left out of the listing
+MAX_FILE_SIZE = int(os.environ.get("MAX_FILE_SIZE", str(DEFAULT_MAX_FILE_SIZE)))
+# How many key files get a one-line summary in the Analyzer context (0 = off)
+SUMMARY_MAX_FILES = int(os.environ.get("SUMMARY_MAX_FILES", "20"))
+
+@st.cache_resource
+def get_summary_store():
+    """
+    Summaries keyed by blob SHA, shared by every repo analyzed on this server.
+    """
+    return SummaryStore()
+
+summary_store = get_summary_store()
+
+INGEST_LIMITS = IngestLimits(TREE_MAX_DEPTH, TREE_MAX_CHARS, MAX_FILE_SIZE, SUMMARY_MAX_FILES)
+
+def get_github_repo(repo_link, github_token):
+    # PyGithub is imported on first use; it is slow to import
+    from github import Github
+    owner, repo_name = parse_repo_link(repo_link)
+    return Github(github_token or None).get_repo(f"{owner}/{repo_name}")
+
+def ingest_key(repo_link, github_token):
+    # Identifies this session's prefetch; the shared walk is keyed by content
+    return request_key(repo_link.rstrip("/"), github_token, INGEST_LIMITS)
+
+def prefetch_repo(repo_link, github_token, cancel=None):
+    """
+    The speculative part of ingestion: the tree walk only, no LLM calls.
+    Sessions walking the same repo at the same commit with the same limits
+    share one walk, even with different tokens. Runs on a background thread.
+    """
+    return agents.prefetch_walk(lambda: get_github_repo(repo_link, github_token), INGEST_LIMITS, cancel)
+
 def fetch_repo_structure(repo_link: str, github_token: str):
+    """
+    Returns (repo_tree, repo_digest): the compact tree listing and one-line
+    summaries of the key files. Reuses this session's prefetched walk when it
+    matches and the default branch hasn't moved since.
+    """
+    # Key files are summarized on worker threads, which can't read session state
+    stats = st.session_state.prompt_stats
+    llm_call = lambda prompt: llm_invoke(prompt, stats)
+    job = st.session_state.prefetch
+    prefetch = job["future"] if job and job["key"] == ingest_key(repo_link, github_token) else None
     try:
-        g = Github(github_token)
-        owner, repo_name = repo_link.rstrip("/").replace("https://github.com/", "").split("/")[:2]
-        repo = g.get_repo(f"{owner}/{repo_name}")
-
-        contents = repo.get_contents("")
-        file_tree = []
-        while contents:
-            file_content = contents.pop(0)
-            if file_content.type == "dir":
-                file_tree.append(f"[DIR] {file_content.path}")
-            else:
-                file_tree.append(f"[FILE] {file_content.path}")
-        return "\n".join(file_tree)
+        return agents.ingest_prefetched(
+            prefetch, lambda: get_github_repo(repo_link, github_token), llm_call, summary_store, INGEST_LIMITS
+        )
     except Exception as e:
         st.error(f"Error fetching repo: {e}")
-        return "Error fetching repository structure."
+        return "Error fetching repository structure.", ""
 
 # ---------------------------
 # Analyzer Agent
 # ---------------------------
 def analyzer_agent(repo_link, github_token):
-    repo_tree = fetch_repo_structure(repo_link, github_token)
-    response = llm.invoke(
-        f"""You are an analyzer agent.
-        Repo: {repo_link}
-        Structure:
-        {repo_tree}
-
-        Summarize in detail what this repository is about.
-        End your response by asking if the user wants a detailed technical breakdown."""
-    )
-    st.session_state.repo_summary = response.content
+    # A new analysis invalidates the previous repo's detailed summary
+    job = st.session_state.deepdive_job
+    if job:
+        job["future"].cancel()
+    st.session_state.deepdive_job = None
+    st.session_state.detailed_summary = None
+
+    repo_tree, repo_digest = fetch_repo_structure(repo_link, github_token)
+    st.session_state.repo_summary = agents.analyze(llm_invoke, repo_link, repo_tree, repo_digest)
+    # Kept for the deep-dive, so it doesn't walk the repo again
+    st.session_state.repo_context = {"link": repo_link, "tree": repo_tree, "digest": repo_digest}
+
+def _run_deepdive(repo_link, repo_tree, repo_digest, stats):
+    llm_call = lambda prompt: llm_invoke(prompt, stats)
+    return agents.deep_dive(llm_call, repo_link, repo_tree, repo_digest)
 
 def analyzer_deepdive(repo_link, github_token):
-    repo_tree = fetch_repo_structure(repo_link, github_token)
-    response = llm.invoke(
-        f"""You are an analyzer agent.
-        Repo: {repo_link}
-        Structure:
-        {repo_tree}
-
-        Provide a detailed technical breakdown including:
-        - Directory structure and relationships
-        - Purpose of each key file
-        - Probable functions and their roles
-        - Entry points and configurations"""
+    job = st.session_state.deepdive_job
+    if job and job["link"] == repo_link:
+        try:
+            st.session_state.detailed_summary = job["future"].result()
+            return
+        except Exception:
+            # Fall back to running it now
+            st.session_state.deepdive_job = None
+
+    repo_context = st.session_state.repo_context
+    if repo_context and repo_context["link"] == repo_link:
+        repo_tree, repo_digest = repo_context["tree"], repo_context["digest"]
+    else:
+        repo_tree, repo_digest = fetch_repo_structure(repo_link, github_token)
+    st.session_state.detailed_summary = _run_deepdive(
+        repo_link, repo_tree, repo_digest, st.session_state.prompt_stats
     )
-    st.session_state.detailed_summary = response.content
+
+# ---------------------------
+# Speculative Prefetch
+# ---------------------------
+GITHUB_REPO_LINK = re.compile(r"^https://github\.com/[\w.-]+/[\w.-]+/?$")
+# The prefilled example link; only a link the user entered is prefetched
+DEFAULT_REPO_LINK = "https://github.com/streamlit/streamlit"
+# Background threads shared by all sessions for prefetch and precompute
+PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", "4"))
+
+@st.cache_resource
+def get_background_pool():
+    return ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+
+def cancel_prefetch():
+    job = st.session_state.prefetch
+    if job:
+        job["cancel"].set()
+        job["future"].cancel()
+        st.session_state.prefetch = None
+
+def start_prefetch(repo_link, github_token):
+    """
+    Starts walking the repo in the background once the user has entered a
+    link and a token that look valid. A prefetch for a previous link is
+    cancelled. Key files are only summarized (LLM calls) on Analyze.
+    """
+    if not github_token or repo_link == DEFAULT_REPO_LINK or not GITHUB_REPO_LINK.match(repo_link):
+        cancel_prefetch()
+        return
+
+    key = ingest_key(repo_link, github_token)
+    job = st.session_state.prefetch
+    if job and job["key"] == key:
+        return
+    cancel_prefetch()
+
+    cancel = threading.Event()
+    future = get_background_pool().submit(prefetch_repo, repo_link, github_token, cancel)
+    st.session_state.prefetch = {"key": key, "future": future, "cancel": cancel}
+
+def start_deepdive_precompute(repo_link):
+    """
+    Runs the deep-dive in the background while the user reads the summary.
+    """
+    repo_context = st.session_state.repo_context
+    job = st.session_state.deepdive_job
+    if st.session_state.detailed_summary or not repo_context or repo_context["link"] != repo_link:
+        return
+    if job and job["link"] == repo_link:
+        return
+
+    future = get_background_pool().submit(
+        _run_deepdive, repo_link, repo_context["tree"], repo_context["digest"], st.session_state.prompt_stats
+    )
+    st.session_state.deepdive_job = {"link": repo_link, "future": future}
 
 # ---------------------------
 # Planner Agent
 # ---------------------------
-def planner_agent(instruction):
-    response = llm.invoke(
-        f"""You are a planner agent helping to modify an existing codebase.
-
-        Repo Summary:
-        {st.session_state.repo_summary or ''}
-
-        Detailed Summary:
-        {st.session_state.detailed_summary or ''}
-
-        User Instruction:
-        {instruction}
-
-        Generate a clear and structured implementation plan that includes:
-        - Step-by-step tasks
-        - Files/modules to modify or create
-        - Functions or classes to add/update
-        - Dependency or configuration changes
-        - Testing and validation guidelines
-        """
+def planner_context(repo_link):
+    return agents.planner_context(
+        repo_link, st.session_state.repo_summary, st.session_state.detailed_summary
     )
-    st.session_state.plan = response.content
+
+def planner_agent(repo_link, instruction):
+    st.session_state.plan = agents.plan(llm_invoke, planner_context(repo_link), instruction)
 
 # ---------------------------
 # Coder Agent
 # ---------------------------
-def coder_agent():
+def coder_agent(repo_link):
     """
     Generates code snippets or modifications based on the approved plan.
     """
@@ -114,71 +233,124 @@ def coder_agent():
         st.error("No implementation plan found. Please run the Planner Agent first.")
         return
 
-    prompt = f"""
-    You are a Coder Agent.
+    st.session_state.code_output = agents.code(llm_invoke, planner_context(repo_link), st.session_state.plan)
+    st.session_state.validation_report = None
 
-    The following repository has been analyzed and planned for modification:
-
-    Repo Summary:
-    {st.session_state.repo_summary or ''}
-
-    Detailed Summary:
-    {st.session_state.detailed_summary or ''}
-
-    Implementation Plan:
-    {st.session_state.plan}
-
-    Your task:
-    - Write code snippets or modifications for each planned step.
-    - Clearly mention filenames and directory paths for each change.
-    - Include necessary imports, function definitions, and docstrings.
-    - Ensure the code integrates cleanly into existing project structure.
-    - Add concise inline comments explaining logic.
+def coder_repair_agent(repo_link, validation_errors):
     """
-
-    response = llm.invoke(prompt)
-    st.session_state.code_output = response.content
+    Asks the Coder to fix its previous output using the failed validation checks.
+    """
+    st.session_state.code_output = agents.repair(
+        llm_invoke,
+        planner_context(repo_link),
+        st.session_state.plan,
+        st.session_state.code_output,
+        validation_errors,
+    )
 
 # ---------------------------
 # Auto Apply Changes (Git Integration)
 # ---------------------------
-import os
 import tempfile
-from git import Repo
 
-def apply_code_changes(repo_link, github_token):
+# "plumbing" commits through a blob-less bare mirror without any checkout;
+# "clone" checks the repo out so validation can also run the impacted tests
+APPLY_MODE = os.environ.get("APPLY_MODE", "plumbing")
+# How many times the Coder may fix its output after failed validation
+VALIDATION_REPAIR_ROUNDS = int(os.environ.get("VALIDATION_REPAIR_ROUNDS", "1"))
+# Per-check time budget (seconds) for syntax/lint/test checks
+VALIDATION_TIMEOUT = int(os.environ.get("VALIDATION_TIMEOUT", str(CHECK_TIMEOUT)))
+# Impacted tests need the target repo's dependencies installed on this server
+VALIDATION_RUN_TESTS = os.environ.get("VALIDATION_RUN_TESTS", "1") == "1"
+
+def validated_files(repo_link, materialize, run_tests):
     """
-    Clones the repo, creates a new branch, applies generated code, commits, and pushes to GitHub.
+    Validates the generated files, giving the Coder repair rounds on failure.
+    `materialize(files)` writes them somewhere and returns that directory.
+    Returns the files once all checks pass, or None.
     """
-    if not st.session_state.code_output:
-        st.error("No generated code found. Please run the Coder Agent first.")
-        return
-
-    try:
-        st.info("⏳ Cloning repository and applying changes...")
-        owner, repo_name = repo_link.rstrip("/").replace("https://github.com/", "").split("/")[:2]
-
-        # Create a temporary directory to clone repo
-        tmp_dir = tempfile.mkdtemp()
-        repo_url = f"https://{github_token}@github.com/{owner}/{repo_name}.git"
-        repo = Repo.clone_from(repo_url, tmp_dir)
+    for attempt in range(VALIDATION_REPAIR_ROUNDS + 1):
+        files = agents.generated_files(st.session_state.code_output)
+        root = materialize(files)
+        with st.spinner("🔍 Validating changes (syntax, lint, impacted tests)..."):
+            results = validate_changes(root, list(files), timeout=VALIDATION_TIMEOUT, run_tests=run_tests)
+        results += missing_paths(parse_code_blocks(st.session_state.code_output))
+        st.session_state.validation_report = format_report(results)
+        if not st.session_state.validation_report:
+            return files
+        if attempt < VALIDATION_REPAIR_ROUNDS:
+            st.warning("⚠️ Validation failed, asking the Coder Agent to repair its changes...")
+            coder_repair_agent(repo_link, st.session_state.validation_report)
+
+    st.error("❌ Generated changes failed validation; nothing was pushed.")
+    return None
+
+def push_with_clone(owner, repo_name, github_token, repo_link, new_branch):
+    from git import Repo
+
+    # Clone into a temporary directory that is removed once the push is done
+    with tempfile.TemporaryDirectory(prefix="ai-agent-clone-", ignore_cleanup_errors=True) as tmp_dir:
+        # The token goes in a header, not the remote URL, so the clone's .git/config
+        # (readable by the validated code and tests) doesn't hold it
+        git_env = auth_env(github_token)
+        repo = Repo.clone_from(f"https://github.com/{owner}/{repo_name}.git", tmp_dir, env=git_env)
 
         # Create a new branch
-        new_branch = "ai-generated-update"
         repo.git.checkout('-b', new_branch)
 
-        # Write generated code to a new file (you can improve this parser later)
-        new_file_path = os.path.join(tmp_dir, "ai_generated_changes.txt")
-        with open(new_file_path, "w", encoding="utf-8") as f:
-            f.write(st.session_state.code_output)
+        def materialize(files):
+            # Each attempt starts from a clean worktree
+            repo.git.reset("--hard")
+            repo.git.clean("-fd")
+            agents.write_files(tmp_dir, files)
+            return tmp_dir
 
-        # Stage and commit the new file
-        repo.git.add(all=True)
+        files = validated_files(repo_link, materialize, VALIDATION_RUN_TESTS)
+        if files is None:
+            return False
+
+        # Stage only the generated files; checks may have left other files behind
+        repo.index.add(list(files))
         repo.index.commit("AI Agent: Applied auto-generated code changes")
 
         # Push to GitHub
         origin = repo.remote(name='origin')
-        origin.push(refspec=f"{new_branch}:{new_branch}")
+        with repo.git.custom_environment(**git_env):
+            origin.push(refspec=f"{new_branch}:{new_branch}")
+    return True
+
+def push_with_plumbing(owner, repo_name, github_token, repo_link, new_branch):
+    with tempfile.TemporaryDirectory(prefix="ai-agent-validate-") as scratch_root:
+        def materialize(files):
+            # Only the changed files exist here, so impacted tests can't run
+            scratch_dir = tempfile.mkdtemp(dir=scratch_root)
+            agents.write_files(scratch_dir, files)
+            return scratch_dir
+
+        files = validated_files(repo_link, materialize, run_tests=False)
+    if files is None:
+        return False
+
+    mirror = mirror_for(f"https://github.com/{owner}/{repo_name}.git", f"{owner}__{repo_name}", github_token)
+    commit_and_push(mirror, files, new_branch, "AI Agent: Applied auto-generated code changes")
+    return True
+
+def apply_code_changes(repo_link, github_token):
+    """
+    Validates the generated code, commits it to a new branch, and pushes it to GitHub.
+    """
+    if not st.session_state.code_output:
+        st.error("No generated code found. Please run the Coder Agent first.")
+        return
+
+    try:
+        st.info("⏳ Applying changes...")
+        owner, repo_name = parse_repo_link(repo_link)
+        new_branch = "ai-generated-update"
+
+        push = push_with_clone if APPLY_MODE == "clone" else push_with_plumbing
+        if not push(owner, repo_name, github_token, repo_link, new_branch):
+            return
 
         st.success(f"✅ Changes successfully pushed to branch `{new_branch}` in `{repo_name}` repo.")
         st.balloons()
@@ -187,6 +359,91 @@ def apply_code_changes(repo_link, github_token):
         st.error(f"❌ Failed to apply changes: {e}")
 
 
+# ---------------------------
+# Utility: Code Output Rendering
+# ---------------------------
+import difflib
+import hashlib
+
+# Files listed per page, and lines sent per part of a large file
+FILES_PER_PAGE = 10
+LINES_PER_PART = 400
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def split_code_output(code_output):
+    """
+    Parses the Coder output once per distinct output instead of on every rerun.
+    Returns (blocks, notes, output_id).
+    """
+    output_id = hashlib.sha1(code_output.encode("utf-8")).hexdigest()[:12]
+    return parse_code_blocks(code_output), prose(code_output), output_id
+
+@st.cache_data(show_spinner=False, ttl=600, max_entries=256)
+def fetch_original_file(repo_link, github_token, path):
+    """
+    Current content of `path` on the default branch, or "" if it is a new file.
+    """
+    from github import UnknownObjectException
+    try:
+        contents = get_github_repo(repo_link, github_token).get_contents(path)
+    except UnknownObjectException:
+        return ""
+    return contents.decoded_content.decode("utf-8", "replace")
+
+def render_code_block(block, key, repo_link, github_token):
+    language = language_for(block.path, block.language)
+    text = block.content
+    if block.path:
+        view = st.radio("View", ["Code", "Diff"], horizontal=True, key=f"view_{key}", label_visibility="collapsed")
+        if view == "Diff":
+            try:
+                original = fetch_original_file(repo_link, github_token, block.path)
+            except Exception as e:
+                st.error(f"Could not load the current `{block.path}`: {e}")
+                return
+            text = "".join(difflib.unified_diff(
+                original.splitlines(keepends=True), block.content.splitlines(keepends=True),
+                f"a/{block.path}", f"b/{block.path}",
+            )) or "(no changes)"
+            language = "diff"
+
+    # Large files are sent one part at a time
+    lines = text.splitlines()
+    parts = max(1, (len(lines) - 1) // LINES_PER_PART + 1)
+    start = 0
+    if parts > 1:
+        part = st.number_input(f"Part (of {parts})", 1, parts, 1, key=f"part_{key}")
+        start = (part - 1) * LINES_PER_PART
+        st.caption(f"Lines {start + 1}–{min(start + LINES_PER_PART, len(lines))} of {len(lines)}")
+    st.code("\n".join(lines[start:start + LINES_PER_PART]), language=language)
+
+def render_code_output(code_output, repo_link, github_token):
+    """
+    Shows the Coder output as a paginated list of files. A file's content is
+    only rendered (and sent to the browser) once the user opens it.
+    """
+    blocks, notes, output_id = split_code_output(code_output)
+    if notes:
+        with st.expander("💬 Coder Notes"):
+            st.markdown(notes)
+    if not blocks:
+        st.markdown(code_output)
+        return
+
+    pages = (len(blocks) - 1) // FILES_PER_PAGE + 1
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", 1, pages, 1, key=f"page_{output_id}")
+    start = (page - 1) * FILES_PER_PAGE
+    st.caption(f"{len(blocks)} files/snippets | showing {start + 1}–{min(start + FILES_PER_PAGE, len(blocks))}")
+
+    for index, block in enumerate(blocks[start:start + FILES_PER_PAGE], start):
+        name = block.path or f"Snippet {index + 1}"
+        key = f"{output_id}_{index}"
+        if st.toggle(f"📄 {name} ({len(block.content.splitlines())} lines)", key=f"show_{key}"):
+            with st.container(border=True):
+                render_code_block(block, key, repo_link, github_token)
+
 # ---------------------------
 # Streamlit UI
 # ---------------------------
@@ -196,8 +453,22 @@ st.caption("**Analyzer → Planner → Coder** | An end-to-end intelligent code
 
 # Sidebar: Repo Info
 st.sidebar.header("🔗 Repository Access")
-repo_link = st.sidebar.text_input("GitHub Repo Link", "https://github.com/streamlit/streamlit")
+repo_link = st.sidebar.text_input("GitHub Repo Link", DEFAULT_REPO_LINK)
 github_token = st.sidebar.text_input("GitHub Token", type="password")
+repo_link = repo_link.strip()
+
+# Start fetching as soon as the inputs look valid, before "Analyze Repo" is clicked
+if st.sidebar.toggle("⚡ Prefetch while I type", value=os.environ.get("PREFETCH", "1") == "1"):
+    start_prefetch(repo_link, github_token)
+    prefetch = st.session_state.prefetch
+    if prefetch and not prefetch["future"].done():
+        st.sidebar.caption("⏳ Prefetching repository...")
+    elif prefetch:
+        failed = prefetch["future"].exception() is not None
+        st.sidebar.caption("⚠️ Prefetch failed; it will be retried on Analyze" if failed else "✅ Repository prefetched")
+else:
+    cancel_prefetch()
+precompute_deepdive = st.sidebar.toggle("🧠 Precompute detailed summary", value=False)
 
 if st.sidebar.button("Analyze Repo"):
     if not repo_link or not github_token:
@@ -209,6 +480,8 @@ if st.sidebar.button("Analyze Repo"):
 if st.session_state.repo_summary:
     st.subheader("📌 Repository Summary")
     st.write(st.session_state.repo_summary)
+    if precompute_deepdive:
+        start_deepdive_precompute(repo_link)
 
     detail_choice = st.radio("Do you want a detailed technical summary?", ["No", "Yes"], index=0)
     if detail_choice == "Yes":
@@ -227,7 +500,7 @@ if st.session_state.repo_summary:
         if not user_instruction.strip():
             st.error("Please enter a valid instruction.")
         else:
-            planner_agent(user_instruction)
+            planner_agent(repo_link, user_instruction)
 
     if st.session_state.plan:
         st.subheader("✅ Implementation Plan")
@@ -269,19 +542,19 @@ if st.session_state.plan:
             progress_bar.empty()
 
             # Call your agent here
-            coder_agent()
+            coder_agent(repo_link)
 
         placeholder.empty()  # remove animation container once done
 
     # Display generated code
     if st.session_state.code_output:
         st.subheader("📝 Generated Code Snippets")
-        st.code(st.session_state.code_output, language="python")
+        render_code_output(st.session_state.code_output, repo_link, github_token)
 
 # Apply Changes Section
 if st.session_state.code_output:
     st.subheader("🚀 Apply Generated Code to GitHub")
-    st.info("This will clone the repository, create a new branch, and push AI-generated changes to GitHub.")
+    st.info("This will validate the AI-generated changes, commit them to a new branch, and push it to GitHub.")
     
     if st.button("Apply & Push Changes"):
         if not github_token or not repo_link:
@@ -289,6 +562,38 @@ if st.session_state.code_output:
         else:
             apply_code_changes(repo_link, github_token)
 
+    if st.session_state.validation_report:
+        with st.expander("🧪 Validation Report", expanded=True):
+            st.code(st.session_state.validation_report, language="text")
+
+# Prompt cache savings
+stats = st.session_state.prompt_stats.summary()
+if stats["calls"]:
+    with st.sidebar.expander("⚡ Prompt Cache"):
+        st.metric("Cached prompt tokens", f"{stats['cached_tokens']:,}", f"{stats['cached_ratio']:.0%} of input")
+        st.caption(
+            f"{stats['cache_hits']}/{stats['calls']} calls hit the cache | "
+            f"avg latency {stats['avg_hit_latency_s']:.1f}s cached vs {stats['avg_miss_latency_s']:.1f}s uncached"
+        )
+
+# Cross-repo summary reuse
+store_stats = summary_store.stats()
+if store_stats["hits"] or store_stats["misses"] or store_stats["failures"]:
+    failures = f", {store_stats['failures']} failed" if store_stats["failures"] else ""
+    st.sidebar.caption(
+        f"📚 Shared summaries: {store_stats['hits']} reused, {store_stats['misses']} newly summarized{failures}"
+    )
+
+# Request coalescing across sessions
+flights = [(flight.name, flight.stats()) for flight in (TREE_FETCHES, SUMMARIES, LLM_CALLS)]
+if any(flight_stats["merged"] for _, flight_stats in flights):
+    with st.sidebar.expander("🔀 Shared Requests"):
+        for name, flight_stats in flights:
+            st.caption(
+                f"**{name}**: {flight_stats['merged']} merged into {flight_stats['executed']} executed "
+                f"({flight_stats['in_flight']} in flight)"
+            )
+
 # Footer
 st.markdown("---")
 st.caption("🚀 Built with LangChain + Grok-4-Fast-Reasoning + Streamlit | AI Super-Agent Prototype")
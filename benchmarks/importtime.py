@@ -0,0 +1,198 @@
+"""
+Import-time profile and cold-start budget.
+
+Each target is imported in a fresh interpreter under `python -X importtime`;
+the report gives the total import time (best of --repeat runs) against the
+target's budget and the packages that cost the most. A target fails when it
+goes over budget or pulls in one of the heavy SDKs that must only be loaded
+on first use (LLM client, PyGithub, GitPython).
+
+"first-paint" imports everything app4.py imports at module level, i.e. what
+Streamlit loads before the first element of the page can render.
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --target agents --budget agents=100 --json
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app4.py")
+
+# Loaded lazily by the app and the agents; importing them up front fails the target
+HEAVY_PACKAGES = {"langchain_xai", "langchain_core", "github", "git", "gitdb"}
+
+# Import budget per target in milliseconds
+COLD_START_BUDGET_MS = float(os.environ.get("COLD_START_BUDGET_MS", "1500"))
+BUDGETS = {
+    "first-paint": COLD_START_BUDGET_MS,
+    "agents": float(os.environ.get("AGENTS_IMPORT_BUDGET_MS", "150")),
+    "git_plumbing": float(os.environ.get("PLUMBING_IMPORT_BUDGET_MS", "50")),
+}
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+# ---------------------------
+# Targets
+# ---------------------------
+def app_imports(path=APP):
+    """
+    Modules imported by the module-level statements of `path`, in order.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name not in modules)
+    return modules
+
+
+def targets():
+    return {
+        "first-paint": app_imports(),
+        "agents": ["agents"],
+        "git_plumbing": ["git_plumbing"],
+    }
+
+
+# ---------------------------
+# Measurement
+# ---------------------------
+def parse_importtime(stderr):
+    """
+    Parses `-X importtime` output into (module, self_us, cumulative_us, depth) rows.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def profile(modules, python=sys.executable):
+    """
+    Imports `modules` in a fresh interpreter. Returns (rows, wall_seconds, error).
+    """
+    code = "\n".join(f"import {module}" for module in modules)
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    wall = time.perf_counter() - started
+    error = None
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ["exit code %d" % proc.returncode])[-1]
+    return parse_importtime(proc.stderr), wall, error
+
+
+def startup_modules():
+    """
+    Modules the interpreter imports before running any code (site, encodings...).
+    """
+    rows, _, _ = profile([])
+    return {module for module, _, _, _ in rows}
+
+
+def summarize(name, modules, repeat, budget_ms, top, startup):
+    best = None
+    for _ in range(repeat):
+        rows, wall, error = profile(modules)
+        if error:
+            return {"target": name, "budget_ms": budget_ms, "error": error, "ok": False}
+        # A module is imported once per process, so startup rows can be dropped by name;
+        # what remains at depth 0 is imported by the -c code itself
+        rows = [row for row in rows if row[0] not in startup]
+        total_ms = sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+        if best is None or total_ms < best[0]:
+            best = (total_ms, wall, rows)
+
+    total_ms, wall, rows = best
+    by_package = {}
+    for module, self_us, _, _ in rows:
+        package = module.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    heavy = sorted({module.split(".")[0] for module, _, _, _ in rows} & HEAVY_PACKAGES)
+    slowest = sorted(by_package.items(), key=lambda item: -item[1])[:top]
+    return {
+        "target": name,
+        "modules": len(rows),
+        "import_ms": total_ms,
+        "interpreter_ms": wall * 1000,
+        "budget_ms": budget_ms,
+        "heavy": heavy,
+        "slowest": [{"package": package, "self_ms": us / 1000} for package, us in slowest],
+        "error": None,
+        "ok": total_ms <= budget_ms and not heavy,
+    }
+
+
+# ---------------------------
+# Report
+# ---------------------------
+def format_report(results):
+    lines = [f"{'target':<14}{'import':>10}{'budget':>10}{'process':>10}{'modules':>9}  status"]
+    for result in results:
+        if result["error"]:
+            lines.append(f"{result['target']:<14}{'-':>10}{result['budget_ms']:>8.0f}ms{'-':>10}{'-':>9}  "
+                         f"ERROR {result['error']}")
+            continue
+        status = "ok" if result["ok"] else "OVER BUDGET" if not result["heavy"] else "HEAVY IMPORTS"
+        lines.append(
+            f"{result['target']:<14}{result['import_ms']:>8.1f}ms{result['budget_ms']:>8.0f}ms"
+            f"{result['interpreter_ms']:>8.0f}ms{result['modules']:>9}  {status}"
+        )
+    for result in results:
+        if result["error"]:
+            continue
+        lines += ["", f"{result['target']}: slowest packages (self time)"]
+        lines += [f"  {row['package']:<30}{row['self_ms']:>8.1f}ms" for row in result["slowest"]]
+        if result["heavy"]:
+            lines.append(f"  loaded at import time: {', '.join(result['heavy'])}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--target", action="append", choices=sorted(BUDGETS), help="target to profile (repeatable)")
+    parser.add_argument("--budget", action="append", default=[], metavar="TARGET=MS", help="override a budget")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per target; the fastest is reported")
+    parser.add_argument("--top", type=int, default=10, help="slowest packages listed per target")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    budgets = dict(BUDGETS)
+    for override in args.budget:
+        name, _, ms = override.partition("=")
+        if name not in budgets or not ms:
+            parser.error(f"invalid budget {override!r}")
+        budgets[name] = float(ms)
+
+    all_targets = targets()
+    startup = startup_modules()
+    results = [
+        summarize(name, all_targets[name], max(1, args.repeat), budgets[name], args.top, startup)
+        for name in (args.target or all_targets)
+    ]
+    print(json.dumps(results, indent=2) if args.json else format_report(results))
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
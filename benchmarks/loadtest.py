@@ -0,0 +1,445 @@
+"""
+Load test: N concurrent sessions through Analyze -> Plan -> Code -> Apply.
+
+Each session runs the same headless code app4.py uses (agents.py), on one
+thread per session like the Streamlit server: ingestion starts as a prefetch
+on a shared background pool and is finished by `agents.ingest_prefetched`,
+and every model call goes through `agents.shared_invoke` on one shared model
+client. External services are replaced by local stand-ins:
+- GitHub REST API: a stub HTTP server serving trees/blobs of a synthetic repo,
+- push target: a local bare origin with partial-clone support,
+- LLM: a fake model that sleeps for an injected latency.
+
+Not covered: Streamlit itself (script reruns, session state, rendering) and
+the app's repair rounds; the sessions' think time is zero, so the prefetch
+saves less here than it does for a user.
+
+Reports throughput, p50/p95/p99 per stage and memory per session.
+
+    python -m benchmarks.loadtest --sessions 20 --llm-latency 0.5
+    python -m benchmarks.loadtest --sessions 50 --concurrency 25 --repos 5 --json
+"""
+import argparse
+import base64
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from git import Repo
+from github import Auth, Github
+
+import agents
+from git_plumbing import BareMirror, commit_and_push
+from prompts import PromptCacheStats
+from singleflight import LLM_CALLS, SUMMARIES, TREE_FETCHES
+from summary_store import SummaryStore
+from validation import failed, validate_changes
+
+STAGES = ["ingest", "analyze", "plan", "code", "apply", "total"]
+OWNER = "loadtest"
+MODEL = "fake-model"
+
+
+# ---------------------------
+# Synthetic Repository + Bare Origin
+# ---------------------------
+def build_origin(root, name, packages, modules):
+    """
+    Creates a synthetic Python repo (plus vendored junk the filter should
+    prune) and returns the path of its bare origin.
+    """
+    work = os.path.join(root, f"{name}-work")
+    files = {"README.md": f"# {name}\n\nSynthetic repository for load testing.\n"}
+    for p in range(packages):
+        files[f"pkg{p}/__init__.py"] = ""
+        for m in range(modules):
+            files[f"pkg{p}/module_{m}.py"] = (
+                f'"""Module {m} of package {p}."""\n\n\ndef handler_{m}(value):\n    return value * {m + 1}\n'
+            )
+        files[f"tests/test_pkg{p}.py"] = f"from pkg{p}.module_0 import handler_0\n\n\ndef test_handler():\n    assert handler_0(2) == 2\n"
+    for i in range(modules):
+        files[f"node_modules/dep{i}/index.js"] = "module.exports = {};\n"
+    files["package-lock.json"] = "{}\n"
+
+    agents.write_files(work, files)
+    git = ["git", "-c", "user.name=loadtest", "-c", "user.email=loadtest@localhost"]
+    subprocess.run(["git", "init", "-q", "-b", "main", work], check=True)
+    subprocess.run([*git, "-C", work, "add", "-A"], check=True)
+    subprocess.run([*git, "-C", work, "commit", "-q", "-m", "Initial commit"], check=True)
+
+    origin = os.path.join(root, f"{name}.git")
+    subprocess.run(["git", "clone", "-q", "--bare", work, origin], check=True)
+    subprocess.run(["git", "-C", origin, "config", "uploadpack.allowFilter", "true"], check=True)
+    shutil.rmtree(work)
+    return origin
+
+
+# ---------------------------
+# Stub GitHub API
+# ---------------------------
+class StubGitHub:
+    """
+    Serves the REST endpoints ingestion uses (repo, branch, git trees, git blobs)
+    from bare repos. Every object is indexed up front so requests are plain
+    dict lookups and thread-safe.
+    """
+
+    def __init__(self, origins, latency=0.0):
+        self.latency = latency
+        self.repos = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        for name, path in origins.items():
+            self.repos[name] = self._index(Repo(path))
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _index(self, repo):
+        commit = repo.commit("main")
+        head = commit.tree
+        trees, blobs = {}, {}
+        for tree in [head] + [item for item in head.traverse() if item.type == "tree"]:
+            prefix = f"{tree.path}/" if tree.path else ""
+            direct = list(tree)
+            nested = list(tree.traverse())
+            trees[tree.hexsha] = {
+                False: [self._entry(item, prefix) for item in direct],
+                True: [self._entry(item, prefix) for item in nested],
+            }
+            for item in nested:
+                if item.type == "blob":
+                    blobs[item.hexsha] = item.data_stream.read()
+        trees["main"] = trees[head.hexsha]
+        return {"trees": trees, "blobs": blobs, "head": head.hexsha, "commit": commit.hexsha}
+
+    @staticmethod
+    def _entry(item, prefix):
+        entry = {"path": item.path[len(prefix):], "mode": f"{item.mode:06o}", "type": item.type, "sha": item.hexsha}
+        if item.type == "blob":
+            entry["size"] = item.size
+        return entry
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                status, body = stub.route(self.path)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def route(self, path):
+        path, _, query = path.partition("?")
+        match = re.match(r"^/repos/([^/]+)/([^/]+)(?:/(git/trees|git/blobs|branches)/([^/]+))?$", path)
+        if not match or match.group(2) not in self.repos:
+            return 404, {"message": "Not Found"}
+        owner, name, kind, sha = match.groups()
+        repo = self.repos[name]
+        url = f"{self.base_url}/repos/{owner}/{name}"
+
+        if kind is None:
+            return 200, {"id": 1, "name": name, "full_name": f"{owner}/{name}", "url": url, "default_branch": "main"}
+        if kind == "branches" and sha == "main":
+            commit_url = f"{url}/commits/{repo['commit']}"
+            return 200, {"name": "main", "commit": {
+                "sha": repo["commit"], "url": commit_url,
+                "commit": {"url": commit_url, "tree": {"sha": repo["head"], "url": f"{url}/git/trees/{repo['head']}"}},
+            }}
+        if kind == "git/trees" and sha in repo["trees"]:
+            entries = repo["trees"][sha]["recursive=1" in query]
+            return 200, {"sha": sha, "url": f"{url}/git/trees/{sha}", "tree": entries, "truncated": False}
+        if kind == "git/blobs" and sha in repo["blobs"]:
+            data = repo["blobs"][sha]
+            return 200, {
+                "sha": sha, "size": len(data), "url": f"{url}/git/blobs/{sha}",
+                "content": base64.b64encode(data).decode("ascii"), "encoding": "base64",
+            }
+        return 404, {"message": "Not Found"}
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ---------------------------
+# Fake LLM
+# ---------------------------
+class FakeResponse:
+    def __init__(self, content, prompt):
+        self.content = content
+        self.usage_metadata = {
+            "input_tokens": len(prompt) // 4,
+            "output_tokens": len(content) // 4,
+            "input_token_details": {"cache_read": 0},
+        }
+
+
+class FakeLLM:
+    """
+    Answers each agent prompt with plausible output after a random delay
+    (normal around `latency`, relative spread `jitter`).
+    """
+
+    def __init__(self, latency, jitter=0.25, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self._random.gauss(self.latency, self.latency * self.jitter))
+        time.sleep(delay)
+        return FakeResponse(self._answer(prompt), prompt)
+
+    @staticmethod
+    def _answer(prompt):
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:10]
+        if "You are a code summarizer." in prompt:
+            return f"Helper module ({digest}) with small pure functions."
+        if "You are a Coder Agent." in prompt:
+            return (
+                "Here are the changes.\n\n"
+                "File: pkg0/module_0.py\n```python\n"
+                '"""Module 0 of package 0."""\n\n\ndef handler_0(value):\n    return value * 1\n\n\n'
+                f"def feature_{digest}(value):\n    return handler_0(value) + 1\n```\n\n"
+                f"File: pkg0/feature_{digest}.py\n```python\n"
+                f"from pkg0.module_0 import feature_{digest}\n\n__all__ = [\"feature_{digest}\"]\n```\n"
+            )
+        if "You are a planner agent" in prompt:
+            instruction = prompt.rsplit("### User Instruction\n", 1)[-1].strip()
+            return f"1. Implement: {instruction}\n2. Add feature module to pkg0.\n3. Cover it with a test."
+        return f"This repository ({digest}) is a synthetic multi-package Python project. " * 8
+
+
+# ---------------------------
+# Sessions
+# ---------------------------
+def run_session(index, env):
+    """
+    One user's full flow. Returns per-stage seconds and retained state size.
+    """
+    repo_name = env["repos"][index % len(env["repos"])]
+    repo_link = f"https://github.com/{OWNER}/{repo_name}"
+    stats = PromptCacheStats()
+    timings = {}
+    started = time.perf_counter()
+
+    def llm_call(prompt):
+        return agents.shared_invoke(env["llm"], MODEL, prompt, stats)
+
+    def open_repo():
+        # Every session has its own token, like separate engineers
+        client = Github(base_url=env["github_url"], auth=Auth.Token(f"loadtest-token-{index}"))
+        return client.get_repo(f"{OWNER}/{repo_name}")
+
+    t = time.perf_counter()
+    # As in the app: the walk starts once the link is entered, Analyze finishes it
+    prefetch = env["background"].submit(agents.prefetch_walk, open_repo, env["limits"])
+    repo_tree, repo_digest = agents.ingest_prefetched(prefetch, open_repo, llm_call, env["store"], env["limits"])
+    timings["ingest"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    repo_summary = agents.analyze(llm_call, repo_link, repo_tree, repo_digest)
+    timings["analyze"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    context = agents.planner_context(repo_link, repo_summary, None)
+    plan = agents.plan(llm_call, context, f"Add feature number {index} to pkg0")
+    timings["plan"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    code_output = agents.code(llm_call, context, plan)
+    timings["code"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    files = agents.generated_files(code_output)
+    scratch_dir = tempfile.mkdtemp(dir=env["root"])
+    agents.write_files(scratch_dir, files)
+    problems = failed(validate_changes(scratch_dir, list(files), run_tests=False))
+    if problems:
+        raise RuntimeError(f"validation failed: {problems[0].output}")
+    commit_and_push(env["mirrors"][repo_name], files, f"loadtest/session-{index}", f"Load test session {index}")
+    timings["apply"] = time.perf_counter() - t
+
+    timings["total"] = time.perf_counter() - started
+    state = [repo_tree, repo_digest, repo_summary, plan, code_output]
+    return timings, sum(len(s.encode("utf-8")) for s in state)
+
+
+# ---------------------------
+# Reporting
+# ---------------------------
+def percentile(values, pct):
+    """
+    Nearest-rank percentile: the smallest value with at least `pct`% of values at or below it.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def _max_rss_mb(who):
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def format_report(report):
+    lines = [
+        f"sessions={report['sessions']} concurrency={report['concurrency']} repos={report['repos']} "
+        f"errors={report['errors']}",
+        f"wall={report['wall_s']:.2f}s throughput={report['throughput_per_s']:.2f} sessions/s "
+        f"({report['throughput_per_s'] * 60:.1f}/min)",
+        "",
+        f"{'stage':<10}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}",
+    ]
+    for stage in STAGES:
+        row = report["stages"][stage]
+        lines.append(f"{stage:<10}" + "".join(f"{row[k]:>8.3f}s" for k in ("p50", "p95", "p99", "max")))
+    memory = report["memory"]
+    lines += [
+        "",
+        f"memory: peak RSS +{memory['rss_delta_mb']:.1f} MB ({memory['rss_per_session_mb']:.2f} MB/session), "
+        f"validation workers peak {memory['children_peak_mb']:.1f} MB, "
+        f"retained state {memory['state_per_session_kb']:.1f} KB/session",
+        f"coalesced: {report['coalescing']['tree_merged']} tree walks, "
+        f"{report['coalescing']['digest_merged']} digests and "
+        f"{report['coalescing']['llm_merged']} LLM calls merged; fake LLM served {report['llm_calls']} calls; "
+        f"stub GitHub served {report['github_requests']} requests",
+    ]
+    lines.append("not covered: Streamlit reruns/session state/rendering, repair rounds, user think time")
+    if report["first_error"]:
+        lines.append(f"first error: {report['first_error']}")
+    return "\n".join(lines)
+
+
+def run(args):
+    root = tempfile.mkdtemp(prefix="loadtest-")
+    background = ThreadPoolExecutor(max_workers=args.prefetch_workers, thread_name_prefix="prefetch")
+    try:
+        repos = [f"repo{i}" for i in range(args.repos)]
+        origins = {name: build_origin(root, name, args.packages, args.modules) for name in repos}
+        env = {
+            "root": root,
+            "repos": repos,
+            "llm": FakeLLM(args.llm_latency, args.llm_jitter),
+            "background": background,
+            "store": SummaryStore(os.path.join(root, "summaries.sqlite3")),
+            "limits": agents.IngestLimits(None, 60000, 1_000_000, args.summary_files),
+            "mirrors": {
+                name: BareMirror(f"file://{path}", os.path.join(root, "mirrors", name))
+                for name, path in origins.items()
+            },
+        }
+        flights = {"tree_merged": TREE_FETCHES, "digest_merged": SUMMARIES, "llm_merged": LLM_CALLS}
+        merged_before = {name: flight.stats()["merged"] for name, flight in flights.items()}
+        rss_before = _max_rss_mb(resource.RUSAGE_SELF)
+
+        with StubGitHub(origins, latency=args.github_latency) as stub:
+            env["github_url"] = stub.base_url
+            results, errors = [], []
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                futures = [pool.submit(run_session, i, env) for i in range(args.sessions)]
+                for future in futures:
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        errors.append(repr(e))
+            wall = time.perf_counter() - started
+
+        rss_delta = max(0.0, _max_rss_mb(resource.RUSAGE_SELF) - rss_before)
+        completed = max(len(results), 1)
+        stages = {}
+        for stage in STAGES:
+            values = [timings[stage] for timings, _ in results]
+            stages[stage] = {k: percentile(values, p) for k, p in (("p50", 50), ("p95", 95), ("p99", 99))}
+            stages[stage]["max"] = max(values, default=0.0)
+        return {
+            "sessions": args.sessions,
+            "concurrency": args.concurrency,
+            "repos": args.repos,
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+            "wall_s": wall,
+            "throughput_per_s": len(results) / wall if wall else 0.0,
+            "stages": stages,
+            "memory": {
+                "rss_delta_mb": rss_delta,
+                "rss_per_session_mb": rss_delta / completed,
+                "children_peak_mb": _max_rss_mb(resource.RUSAGE_CHILDREN),
+                "state_per_session_kb": sum(size for _, size in results) / completed / 1024,
+            },
+            "coalescing": {
+                name: flight.stats()["merged"] - merged_before[name] for name, flight in flights.items()
+            },
+            "llm_calls": env["llm"].calls,
+            "github_requests": stub.requests,
+        }
+    finally:
+        background.shutdown(cancel_futures=True)
+        if args.keep:
+            print(f"kept working directory: {root}", file=sys.stderr)
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=10, help="total sessions to run")
+    parser.add_argument("--concurrency", type=int, help="sessions running at once (default: all)")
+    parser.add_argument("--repos", type=int, default=1, help="distinct repos the sessions spread over")
+    parser.add_argument("--packages", type=int, default=5, help="packages in each synthetic repo")
+    parser.add_argument("--modules", type=int, default=20, help="modules per package")
+    parser.add_argument("--summary-files", type=int, default=20, help="key files summarized per repo")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="mean fake LLM latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.25, help="relative spread of LLM latency")
+    parser.add_argument("--prefetch-workers", type=int, default=4, help="shared prefetch threads, like PREFETCH_WORKERS")
+    parser.add_argument("--github-latency", type=float, default=0.0, help="stub GitHub latency per request (s)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--keep", action="store_true", help="keep the origins, mirrors and scratch dirs")
+    args = parser.parse_args(argv)
+    args.concurrency = args.concurrency or args.sessions
+
+    report = run(args)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
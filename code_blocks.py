@@ -0,0 +1,130 @@
+"""
+Splits the Coder's markdown output into per-file code blocks.
+
+The Coder is asked to put `File: path/to/file.py` on the line before each
+fenced block, but the usual variants are accepted too: a markdown heading or
+bold/backticked path right above the fence, or a path comment on the block's
+first line (`# path/to/file.py`, `// src/app.js`).
+"""
+import posixpath
+import re
+from collections import namedtuple
+
+CodeBlock = namedtuple("CodeBlock", ["path", "language", "content"])
+
+_FENCE = re.compile(r"^\s*(`{3,}|~{3,})\s*([\w+#.-]*)")
+_PATH = r"([\w.-]+(?:/[\w.-]+)*\.[\w]+|(?:[\w.-]+/)*(?:Dockerfile|Makefile|Procfile|LICENSE))"
+_HEADER_PATH = re.compile(
+    r"^\s*(?:#{1,6}\s*)?(?:\d+\.\s*)?(?:\*\*|__)?(?:(?:File|Filename|Path)\s*(?:\*\*|__)?\s*:\s*)?(?:\*\*|__)?\s*`?"
+    + _PATH + r"`?(?:\*\*|__)?\s*:?\s*(?:\(.*\))?\s*$",
+    re.IGNORECASE,
+)
+_COMMENT_PATH = re.compile(r"^\s*(?:#|//|--|/\*|<!--)\s*(?:File(?:name)?\s*:\s*)?" + _PATH + r"\s*(?:\*/|-->)?\s*$")
+
+
+def safe_path(path):
+    """
+    Normalizes a repo-relative path; returns None for absolute paths or paths
+    that escape the repository.
+    """
+    path = posixpath.normpath(path.strip())
+    if path in (".", "..") or path.startswith(("/", "../")):
+        return None
+    return path
+
+
+def parse_code_blocks(text):
+    """
+    Returns the CodeBlocks found in `text` in order. Blocks without a
+    recognizable path get `path=None`.
+    """
+    blocks = []
+    lines = (text or "").splitlines()
+    i = 0
+    while i < len(lines):
+        match = _FENCE.match(lines[i])
+        if not match:
+            i += 1
+            continue
+
+        fence, language = match.group(1), match.group(2).lower()
+        body = []
+        j = i + 1
+        while j < len(lines) and not lines[j].strip().startswith(fence):
+            body.append(lines[j])
+            j += 1
+
+        path = None
+        # Nearest non-empty line above the fence
+        k = i - 1
+        while k >= 0 and not lines[k].strip():
+            k -= 1
+        if k >= 0:
+            header = _HEADER_PATH.match(lines[k])
+            if header:
+                path = header.group(1)
+        if path is None and body:
+            comment = _COMMENT_PATH.match(body[0])
+            if comment:
+                path = comment.group(1)
+
+        content = "\n".join(body) + "\n" if body else ""
+        blocks.append(CodeBlock(safe_path(path) if path else None, language, content))
+        i = j + 1
+    return blocks
+
+
+def changed_files(text):
+    """
+    Maps path -> new content for every block with a usable path. If the same
+    file appears more than once, the last block wins.
+    """
+    return {block.path: block.content for block in parse_code_blocks(text) if block.path}
+
+
+# ---------------------------
+# Display Helpers
+# ---------------------------
+LANGUAGES = {
+    ".py": "python", ".js": "javascript", ".jsx": "jsx", ".ts": "typescript", ".tsx": "tsx",
+    ".json": "json", ".yaml": "yaml", ".yml": "yaml", ".toml": "toml", ".ini": "ini",
+    ".cfg": "ini", ".md": "markdown", ".rst": "rst", ".html": "html", ".css": "css",
+    ".scss": "scss", ".sh": "bash", ".bash": "bash", ".sql": "sql", ".go": "go", ".rs": "rust",
+    ".java": "java", ".kt": "kotlin", ".scala": "scala", ".rb": "ruby", ".php": "php",
+    ".c": "c", ".h": "c", ".cc": "cpp", ".cpp": "cpp", ".hpp": "cpp", ".cs": "csharp",
+    ".swift": "swift", ".xml": "xml", ".txt": "text",
+}
+_FILENAME_LANGUAGES = {"Dockerfile": "docker", "Makefile": "makefile"}
+# Fence tags the highlighter knows under another name
+_FENCE_ALIASES = {"py": "python", "js": "javascript", "ts": "typescript", "sh": "bash", "shell": "bash", "yml": "yaml"}
+
+
+def language_for(path, fence_language=""):
+    """
+    Highlighting language from the file name, falling back to the fence tag.
+    """
+    if path:
+        name = posixpath.basename(path)
+        if name in _FILENAME_LANGUAGES:
+            return _FILENAME_LANGUAGES[name]
+        language = LANGUAGES.get(posixpath.splitext(name)[1].lower())
+        if language:
+            return language
+    return _FENCE_ALIASES.get(fence_language, fence_language) or "text"
+
+
+def prose(text):
+    """
+    The Coder's explanation: everything outside fenced code blocks.
+    """
+    lines = []
+    fence = None
+    for line in (text or "").splitlines():
+        match = _FENCE.match(line)
+        if fence is None and match:
+            fence = match.group(1)
+        elif fence is not None and line.strip().startswith(fence):
+            fence = None
+        elif fence is None:
+            lines.append(line)
+    return "\n".join(lines).strip()
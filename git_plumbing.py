@@ -0,0 +1,186 @@
+"""
+Checkout-free commits against a bare mirror.
+
+The mirror is a shallow, blob-less bare clone (`--depth=1 --filter=blob:none`):
+it holds the commit and trees of the base branch but no file contents. A
+change is committed by writing the new blobs to the object database and
+rewriting only the trees on the paths from the changed files up to the root,
+so the work is proportional to the change rather than to the repository.
+The new commit is then pushed straight to a branch on the origin.
+"""
+import base64
+import io
+import os
+import tempfile
+import threading
+
+MIRROR_ROOT = os.environ.get("GIT_MIRROR_DIR") or os.path.join(tempfile.gettempdir(), "ai-super-agent-mirrors")
+
+FILE_MODE = 0o100644
+EXECUTABLE_MODE = 0o100755
+TREE_MODE = 0o040000
+
+COMMITTER_NAME = "AI Super-Agent"
+COMMITTER_EMAIL = "ai-super-agent@users.noreply.github.com"
+
+# One lock per mirror path: sessions pushing to the same repo share a mirror
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _mirror_lock(path):
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+def auth_env(token):
+    """
+    Passes the token as an HTTP header through the environment so it is never
+    written to the mirror's config (also covers lazy fetches git runs itself).
+    """
+    env = {"GIT_TERMINAL_PROMPT": "0"}
+    if token:
+        basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+        env.update({
+            "GIT_CONFIG_COUNT": "1",
+            "GIT_CONFIG_KEY_0": "http.extraHeader",
+            "GIT_CONFIG_VALUE_0": f"Authorization: Basic {basic}",
+        })
+    return env
+
+
+def _tree_sort_key(entry):
+    # Git orders tree entries as if directory names had a trailing slash
+    _, mode, name = entry
+    return name + "/" if mode == TREE_MODE else name
+
+
+class BareMirror:
+    """
+    A cached bare mirror of one remote, used to build and push commits
+    without a working tree.
+    """
+
+    def __init__(self, remote_url, path, token=None):
+        self.remote_url = remote_url
+        self.path = path
+        self.env = auth_env(token)
+        self.lock = _mirror_lock(path)
+        with self.lock:
+            self.repo = self._open() if os.path.isdir(path) else self._init()
+
+    # GitPython is imported on first use so importing this module stays cheap
+    def _open(self):
+        from git import Repo
+        return Repo(self.path)
+
+    def _init(self):
+        from git import Repo
+        repo = Repo.init(self.path, bare=True, mkdir=True)
+        with repo.config_writer() as config:
+            config.set_value('remote "origin"', "url", self.remote_url)
+            config.set_value('remote "origin"', "promisor", "true")
+            config.set_value('remote "origin"', "partialclonefilter", "blob:none")
+            config.set_value("extensions", "partialClone", "origin")
+            config.set_value("core", "repositoryformatversion", "1")
+            config.set_value("user", "name", COMMITTER_NAME)
+            config.set_value("user", "email", COMMITTER_EMAIL)
+        return repo
+
+    def _git(self, *args, **kwargs):
+        with self.repo.git.custom_environment(**self.env):
+            return self.repo.git.execute(["git", *args], **kwargs)
+
+    def default_branch(self):
+        output = self._git("ls-remote", "--symref", "origin", "HEAD")
+        for line in output.splitlines():
+            if line.startswith("ref: refs/heads/"):
+                return line.split("\t")[0][len("ref: refs/heads/"):]
+        raise ValueError(f"Could not determine the default branch of {self.remote_url}")
+
+    def sync(self, branch=None):
+        """
+        Fetches the tip of `branch` (default: the remote's HEAD) without blobs
+        and returns (branch, commit sha).
+        """
+        branch = branch or self.default_branch()
+        self._git(
+            "fetch", "--depth=1", "--filter=blob:none", "--no-tags", "origin",
+            f"+refs/heads/{branch}:refs/remotes/origin/{branch}",
+        )
+        return branch, self.repo.git.rev_parse(f"refs/remotes/origin/{branch}")
+
+    # ---------------------------
+    # Object Writing
+    # ---------------------------
+    def _store(self, kind, data):
+        from gitdb import IStream
+        return self.repo.odb.store(IStream(kind, len(data), io.BytesIO(data))).binsha
+
+    def _read_tree(self, binsha):
+        if binsha is None:
+            return []
+        from git.objects.fun import tree_entries_from_data
+        return list(tree_entries_from_data(self.repo.odb.stream(binsha).read()))
+
+    def _write_tree(self, binsha, changes):
+        """
+        `changes` maps a name in this tree to blob bytes or to a nested dict of
+        changes. Unchanged entries are reused as-is; returns the new tree sha.
+        """
+        from git.objects.fun import tree_to_stream
+        entries = {name: (sha, mode, name) for sha, mode, name in self._read_tree(binsha)}
+        for name, change in changes.items():
+            if isinstance(change, dict):
+                existing = entries.get(name)
+                subtree = existing[0] if existing and existing[1] == TREE_MODE else None
+                entries[name] = (self._write_tree(subtree, change), TREE_MODE, name)
+            else:
+                # Keep the executable bit; a symlink or submodule overwritten
+                # with file content becomes a regular file
+                existing = entries.get(name)
+                mode = existing[1] if existing and existing[1] in (FILE_MODE, EXECUTABLE_MODE) else FILE_MODE
+                entries[name] = (self._store(b"blob", change), mode, name)
+
+        buf = io.BytesIO()
+        tree_to_stream(sorted(entries.values(), key=_tree_sort_key), buf.write)
+        return self._store(b"tree", buf.getvalue())
+
+    def commit_files(self, base, files, message):
+        """
+        Creates a commit on top of `base` that writes `files` ({path: text})
+        and returns its sha. No working tree or blob download is involved.
+        """
+        changes = {}
+        for path, content in files.items():
+            node = changes
+            *dirs, name = path.split("/")
+            for part in dirs:
+                node = node.setdefault(part, {})
+            node[name] = content.encode("utf-8")
+
+        base_tree = self.repo.commit(base).tree.binsha
+        tree = self._write_tree(base_tree, changes).hex()
+        return self._git("commit-tree", tree, "-p", base, "-m", message)
+
+    def push(self, commit, branch):
+        self._git("push", "origin", f"{commit}:refs/heads/{branch}")
+
+
+def mirror_for(remote_url, name, token=None):
+    """
+    Returns the shared BareMirror for `remote_url`, stored under MIRROR_ROOT/name.
+    """
+    return BareMirror(remote_url, os.path.join(MIRROR_ROOT, name), token)
+
+
+def commit_and_push(mirror, files, branch, message):
+    """
+    Syncs the mirror, commits `files` on the default branch tip and pushes the
+    commit to `branch`. Returns the new commit sha.
+    """
+    with mirror.lock:
+        _, base = mirror.sync()
+        commit = mirror.commit_files(base, files, message)
+        mirror.push(commit, branch)
+    return commit
@@ -0,0 +1,192 @@
+"""
+Prompt layout for the agents.
+
+Providers cache prompts by prefix, so every prompt is built in the same order:
+the large shared context first (repo, structure, summaries), then the agent's
+fixed instructions, then the volatile input (user instruction, plan) last.
+The context block is rendered byte-identically for the same inputs, so the
+Planner and Coder (and Analyzer / deep-dive) reuse each other's cached prefix.
+"""
+import textwrap
+import threading
+
+
+# ---------------------------
+# Shared Context Block
+# ---------------------------
+def _section(title, body):
+    return f"### {title}\n{(body or '').strip()}\n"
+
+
+def render_context(repo_link, repo_tree=None, repo_digest=None, repo_summary=None, detailed_summary=None):
+    """
+    Renders the stable context block. Sections always appear in the same order
+    and empty ones are left out, so the same inputs give the same bytes.
+    """
+    parts = [_section("Repository", repo_link)]
+    if repo_tree:
+        parts.append(_section("Structure", repo_tree))
+    if repo_digest:
+        parts.append(_section("Key Files", repo_digest))
+    if repo_summary:
+        parts.append(_section("Repo Summary", repo_summary))
+    if detailed_summary:
+        parts.append(_section("Detailed Summary", detailed_summary))
+    return "## Context\n" + "\n".join(parts)
+
+
+# ---------------------------
+# Prompt Templates
+# ---------------------------
+class PromptTemplate:
+    """
+    An agent prompt: fixed role/instructions plus named volatile sections that
+    are always appended after the shared context.
+    """
+
+    def __init__(self, role, instructions, volatile=()):
+        self.role = role.strip()
+        self.instructions = textwrap.dedent(instructions).strip()
+        self.volatile = tuple(volatile)
+
+    def render(self, context, **values):
+        missing = [name for name in self.volatile if name not in values]
+        if missing:
+            raise KeyError(f"Missing prompt values: {', '.join(missing)}")
+
+        prompt = f"{context}\n" if context else ""
+        prompt += f"## Task\n{self.role}\n{self.instructions}\n"
+        for name in self.volatile:
+            title = name.replace("_", " ").title()
+            prompt += "\n" + _section(title, values[name])
+        return prompt
+
+
+ANALYZER_PROMPT = PromptTemplate(
+    "You are an analyzer agent.",
+    """
+    Summarize in detail what this repository is about.
+    End your response by asking if the user wants a detailed technical breakdown.
+    """,
+)
+
+DEEPDIVE_PROMPT = PromptTemplate(
+    "You are an analyzer agent.",
+    """
+    Provide a detailed technical breakdown including:
+    - Directory structure and relationships
+    - Purpose of each key file
+    - Probable functions and their roles
+    - Entry points and configurations
+    """,
+)
+
+PLANNER_PROMPT = PromptTemplate(
+    "You are a planner agent helping to modify an existing codebase.",
+    """
+    Generate a clear and structured implementation plan for the user instruction below that includes:
+    - Step-by-step tasks
+    - Files/modules to modify or create
+    - Functions or classes to add/update
+    - Dependency or configuration changes
+    - Testing and validation guidelines
+    """,
+    volatile=("user_instruction",),
+)
+
+CODER_PROMPT = PromptTemplate(
+    "You are a Coder Agent.",
+    """
+    The repository above has been analyzed and planned for modification.
+
+    Your task:
+    - Write code snippets or modifications for each step of the implementation plan below.
+    - Clearly mention filenames and directory paths for each change: put `File: path/to/file`
+      on the line right before each fenced code block, and give the complete new file contents.
+    - Include necessary imports, function definitions, and docstrings.
+    - Ensure the code integrates cleanly into existing project structure.
+    - Add concise inline comments explaining logic.
+    """,
+    volatile=("implementation_plan",),
+)
+
+FILE_SUMMARY_PROMPT = PromptTemplate(
+    "You are a code summarizer.",
+    """
+    Summarize the file below in one or two sentences: what it is for and its key
+    functions, classes or settings. Reply with the summary only.
+    """,
+    volatile=("file_contents",),
+)
+
+REPAIR_PROMPT = PromptTemplate(
+    "You are a Coder Agent.",
+    """
+    Your previous code changes failed pre-push validation (syntax, lint or tests).
+    Fix every reported problem while still implementing the plan below.
+    Repeat the complete output in the same format: `File: path/to/file` on the line right
+    before each fenced code block, with the complete new file contents.
+    """,
+    volatile=("implementation_plan", "previous_code", "validation_errors"),
+)
+
+
+# ---------------------------
+# Cached-Token Accounting
+# ---------------------------
+def cached_tokens(response):
+    """
+    Returns (input_tokens, cached_input_tokens) reported by the provider, or
+    (0, 0) when the response carries no usage data.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        details = usage.get("input_token_details") or {}
+        return usage.get("input_tokens", 0), details.get("cache_read", 0) or 0
+
+    # Older integrations only expose the raw OpenAI-style usage block
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    details = token_usage.get("prompt_tokens_details") or {}
+    return token_usage.get("prompt_tokens", 0), details.get("cached_tokens", 0) or 0
+
+
+class PromptCacheStats:
+    """
+    Thread-safe counters for prompt tokens served from the provider cache,
+    with latency split by whether the call hit the cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cache_hits = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+
+    def record(self, response, seconds):
+        total, cached = cached_tokens(response)
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += total
+            self.cached_tokens += cached
+            if cached:
+                self.cache_hits += 1
+                self.hit_seconds += seconds
+            else:
+                self.miss_seconds += seconds
+
+    def summary(self):
+        with self._lock:
+            misses = self.calls - self.cache_hits
+            return {
+                "calls": self.calls,
+                "cache_hits": self.cache_hits,
+                "input_tokens": self.input_tokens,
+                "cached_tokens": self.cached_tokens,
+                "cached_ratio": self.cached_tokens / self.input_tokens if self.input_tokens else 0.0,
+                "avg_hit_latency_s": self.hit_seconds / self.cache_hits if self.cache_hits else 0.0,
+                "avg_miss_latency_s": self.miss_seconds / misses if misses else 0.0,
+            }
+
@@ -0,0 +1,219 @@
+"""
+Ingestion filter: decides which repository paths are worth listing.
+
+Combines the target repo's own `.gitignore` / `.gitattributes`
+(`linguist-vendored`, `linguist-generated`) with built-in heuristics for
+vendored dependencies, build output, lockfiles and binaries, plus a file size
+limit. Directories are checked before they are fetched so excluded subtrees
+are never walked.
+"""
+import os
+import posixpath
+import re
+
+# Dependency and build-output directories, matched by name at any depth
+VENDORED_DIRS = {
+    "node_modules", "bower_components", "jspm_packages", "vendor", "vendors",
+    "third_party", "third-party", "thirdparty", "Pods", "Carthage",
+    "site-packages", ".venv", "venv", ".tox", ".nox", ".git", ".hg", ".svn",
+}
+GENERATED_DIRS = {
+    "dist", "build", "out", "target", "obj", "coverage", "htmlcov",
+    "__pycache__", ".pytest_cache", ".mypy_cache", ".ruff_cache", ".gradle",
+    ".next", ".nuxt", ".cache", ".parcel-cache", ".terraform", "DerivedData",
+}
+LOCKFILES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+    "bun.lockb", "poetry.lock", "Pipfile.lock", "pdm.lock", "uv.lock",
+    "Cargo.lock", "Gemfile.lock", "composer.lock", "go.sum", "mix.lock",
+    "pubspec.lock", "Podfile.lock", "packages.lock.json", "flake.lock",
+}
+GENERATED_SUFFIXES = (
+    ".min.js", ".min.css", ".js.map", ".css.map", "_pb2.py", "_pb2_grpc.py",
+    ".pb.go", ".pb.cc", ".pb.h", ".generated.cs", ".g.dart", ".designer.cs",
+)
+BINARY_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".icns", ".webp", ".tiff", ".psd",
+    ".mp3", ".mp4", ".wav", ".ogg", ".flac", ".avi", ".mov", ".mkv", ".webm",
+    ".zip", ".tar", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".jar", ".war",
+    ".whl", ".egg", ".exe", ".dll", ".so", ".dylib", ".a", ".lib", ".o", ".obj",
+    ".class", ".pyc", ".pyo", ".wasm", ".bin", ".dat", ".db", ".sqlite",
+    ".ttf", ".otf", ".woff", ".woff2", ".eot", ".pdf", ".doc", ".docx",
+    ".xls", ".xlsx", ".ppt", ".pptx", ".pkl", ".npy", ".npz", ".h5", ".onnx", ".pt",
+}
+
+DEFAULT_MAX_FILE_SIZE = 1_000_000
+
+
+# ---------------------------
+# Git Pattern Matching
+# ---------------------------
+def _glob_to_regex(pattern):
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end
+        elif c == "\\" and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def _compile_pattern(pattern):
+    """
+    Compiles a gitignore-style pattern to a regex over paths relative to the
+    directory that holds the ignore file. Patterns without an inner slash
+    match at any depth.
+    """
+    anchored = "/" in pattern
+    regex = _glob_to_regex(pattern.lstrip("/"))
+    return re.compile(("" if anchored else "(?:.*/)?") + regex + r"\Z")
+
+
+def _relative(path, base):
+    if not base:
+        return path
+    if path.startswith(base + "/"):
+        return path[len(base) + 1:]
+    return None
+
+
+# ---------------------------
+# Repo Filter
+# ---------------------------
+class RepoFilter:
+    """
+    Path filter for one repository. Feed it ignore/attribute files with
+    `add_gitignore` / `add_gitattributes` (parents before children), then ask
+    `exclusion_reason` for each path.
+    """
+
+    def __init__(self, max_file_size=DEFAULT_MAX_FILE_SIZE, use_heuristics=True):
+        self.max_file_size = max_file_size
+        self.use_heuristics = use_heuristics
+        # (base_dir, regex, negate, dir_only) in precedence order
+        self._ignore_rules = []
+        # (base_dir, regex, {attribute: bool})
+        self._attr_rules = []
+
+    def add_gitignore(self, base, text):
+        for line in text.splitlines():
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            elif line.startswith(("\\#", "\\!")):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if line:
+                self._ignore_rules.append((base, _compile_pattern(line), negate, dir_only))
+
+    def add_gitattributes(self, base, text):
+        for line in text.splitlines():
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            attrs = {}
+            for field in fields[1:]:
+                name, _, value = field.lstrip("-!").partition("=")
+                if name not in ("linguist-vendored", "linguist-generated"):
+                    continue
+                attrs[name] = not field.startswith(("-", "!")) and value.lower() not in ("false", "0")
+            if not attrs:
+                continue
+            pattern = fields[0]
+            self._attr_rules.append((base, _compile_pattern(pattern), attrs))
+            # `vendor/** linguist-vendored` also covers the directory itself,
+            # which lets the walk prune it instead of filtering file by file.
+            # The "/**" made the pattern anchored, so the directory rule is too.
+            if pattern.endswith("/**"):
+                self._attr_rules.append((base, _compile_pattern("/" + pattern[:-3]), attrs))
+
+    def _ignored(self, path, is_dir):
+        for base, regex, negate, dir_only in reversed(self._ignore_rules):
+            rel = _relative(path, base)
+            if rel is None or (dir_only and not is_dir):
+                continue
+            if regex.match(rel):
+                return not negate
+        return False
+
+    def _attribute(self, path, name):
+        for base, regex, attrs in reversed(self._attr_rules):
+            if name not in attrs:
+                continue
+            rel = _relative(path, base)
+            if rel is not None and regex.match(rel):
+                return attrs[name]
+        return None
+
+    def _heuristic_reason(self, path, is_dir):
+        name = posixpath.basename(path)
+        if is_dir:
+            if name in VENDORED_DIRS:
+                return "vendored"
+            if name in GENERATED_DIRS:
+                return "generated"
+            return None
+        if name in LOCKFILES:
+            return "lockfile"
+        lower = name.lower()
+        if lower.endswith(GENERATED_SUFFIXES):
+            return "generated"
+        if os.path.splitext(lower)[1] in BINARY_EXTENSIONS:
+            return "binary"
+        return None
+
+    def exclusion_reason(self, path, is_dir=False, size=None):
+        """
+        Returns why `path` should be skipped ("gitignore", "vendored",
+        "generated", "lockfile", "binary", "too large"), or None to keep it.
+        Explicit `linguist-*=false` attributes override the heuristics.
+        """
+        if self._ignored(path, is_dir):
+            return "gitignore"
+
+        vendored = self._attribute(path, "linguist-vendored")
+        generated = self._attribute(path, "linguist-generated")
+        if vendored:
+            return "vendored"
+        if generated:
+            return "generated"
+
+        if self.use_heuristics:
+            reason = self._heuristic_reason(path, is_dir)
+            if reason == "vendored" and vendored is None:
+                return reason
+            if reason == "generated" and generated is None:
+                return reason
+            if reason in ("lockfile", "binary"):
+                return reason
+
+        if not is_dir and self.max_file_size and size and size > self.max_file_size:
+            return "too large"
+        return None
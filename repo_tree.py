@@ -0,0 +1,299 @@
+"""
+Repository tree fetching and compact encoding for prompts.
+
+Instead of one `[FILE] full/path` line per entry, the tree is rendered as an
+indented trie:
+
+    src/app/
+      *.py: main, config, utils
+      handlers/ (14 *.py)
+    README.md
+
+Single-child directory chains are collapsed (`src/app/`), sibling files are
+grouped by extension, and large single-extension directories are reduced to a
+count. Depth and size limits keep the output within a prompt budget.
+Vendored, generated and ignored paths are dropped during the walk (see
+repo_filter.py).
+"""
+import base64
+import os
+import posixpath
+from collections import namedtuple
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from repo_filter import RepoFilter
+
+TreeEntry = namedtuple("TreeEntry", ["path", "type", "size", "sha"])
+
+# Directories whose whole subtree has one extension and at least this many
+# files are shown as a count, e.g. `tests/ (412 *.py)`.
+HOMOGENEOUS_MIN_FILES = 12
+
+
+def parse_repo_link(repo_link):
+    """
+    Returns (owner, repo_name) for a GitHub repo URL.
+    """
+    return tuple(repo_link.rstrip("/").replace("https://github.com/", "").split("/")[:2])
+
+
+# ---------------------------
+# Fetching
+# ---------------------------
+RULE_FILES = (".gitignore", ".gitattributes")
+# Directories at this depth are fetched with one recursive call each instead
+# of level by level; anything excluded above it is never requested at all.
+PRUNE_DEPTH = 3
+
+
+class _TreeWalk:
+    def __init__(self, repo, repo_filter, cancel=None):
+        self.repo = repo
+        self.filter = repo_filter
+        self.cancel = cancel
+        # directory -> {rule file name: blob sha}, and directories already applied
+        self.rule_files = {}
+        self.loaded = set()
+        self.excluded_dirs = []
+        self.excluded_files = {}
+        self.truncated = False
+
+    def check_cancelled(self):
+        if self.cancel is not None and self.cancel.is_set():
+            raise CancelledError()
+
+    def list(self, base, sha, recursive):
+        self.check_cancelled()
+        tree = self.repo.get_git_tree(sha, recursive=recursive)
+        prefix = f"{base}/" if base else ""
+        entries = [TreeEntry(prefix + e.path, e.type, e.size or 0, e.sha) for e in tree.tree]
+        return entries, bool(tree.raw_data.get("truncated"))
+
+    def _load_rules(self, directory):
+        # Parents first, so deeper ignore files take precedence
+        parts = directory.split("/") if directory else []
+        for i in range(len(parts) + 1):
+            current = "/".join(parts[:i])
+            if current in self.loaded:
+                continue
+            self.loaded.add(current)
+            for name, sha in sorted(self.rule_files.get(current, {}).items()):
+                blob = self.repo.get_git_blob(sha)
+                text = base64.b64decode(blob.content).decode("utf-8", "replace")
+                if name == ".gitignore":
+                    self.filter.add_gitignore(current, text)
+                else:
+                    self.filter.add_gitattributes(current, text)
+
+    def filter_entries(self, entries):
+        for entry in entries:
+            directory, name = posixpath.split(entry.path)
+            if entry.type == "blob" and name in RULE_FILES:
+                self.rule_files.setdefault(directory, {})[name] = entry.sha
+
+        pruned = set()
+        kept = []
+        for entry in sorted(entries, key=lambda e: e.path):
+            directory = posixpath.dirname(entry.path)
+            if any(p in pruned for p in _ancestors(directory)):
+                continue
+            self._load_rules(directory)
+            is_dir = entry.type == "tree"
+            reason = self.filter.exclusion_reason(entry.path, is_dir=is_dir, size=entry.size)
+            if reason and is_dir:
+                pruned.add(entry.path)
+                self.excluded_dirs.append((entry.path, reason))
+            elif reason:
+                self.excluded_files[reason] = self.excluded_files.get(reason, 0) + 1
+            elif entry.type in ("blob", "tree"):
+                kept.append(entry)
+        return kept
+
+
+def _ancestors(directory):
+    parts = directory.split("/") if directory else []
+    return ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+def walk_tree(repo, repo_filter=None, prune_depth=PRUNE_DEPTH, max_workers=8, cancel=None, root=None):
+    """
+    Lists the tree `root` (a tree SHA; default: the default branch), skipping
+    paths rejected by `repo_filter`.
+    Excluded directories are pruned before their contents are requested.
+    Setting the `cancel` event stops the walk with CancelledError.
+
+    Returns (entries, report) where report holds `excluded_dirs`
+    [(path, reason)], `excluded_files` {reason: count} and `truncated`.
+    """
+    walk = _TreeWalk(repo, repo_filter or RepoFilter(), cancel)
+    entries = []
+    level = [("", root or repo.default_branch)]
+    depth = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while level:
+            walk.check_cancelled()
+            recursive = depth >= prune_depth
+            listings = pool.map(lambda item: walk.list(item[0], item[1], recursive), level)
+            next_level = []
+            for listing, truncated in listings:
+                walk.truncated |= truncated
+                for entry in walk.filter_entries(listing):
+                    entries.append(entry)
+                    if entry.type == "tree" and not recursive:
+                        next_level.append((entry.path, entry.sha))
+            level = next_level
+            depth += 1
+
+    report = {
+        "excluded_dirs": walk.excluded_dirs,
+        "excluded_files": walk.excluded_files,
+        "truncated": walk.truncated,
+    }
+    return entries, report
+
+
+def describe_exclusions(report, limit=10):
+    """
+    One-line note for the prompt about what the walk left out.
+    """
+    notes = []
+    dirs = report["excluded_dirs"]
+    if dirs:
+        names = ", ".join(f"{path}/" for path, _ in dirs[:limit])
+        if len(dirs) > limit:
+            names += f", +{len(dirs) - limit} more"
+        notes.append(f"{len(dirs)} vendored/generated/ignored directories ({names})")
+    files = report["excluded_files"]
+    if files:
+        counts = ", ".join(f"{count} {reason}" for reason, count in sorted(files.items()))
+        notes.append(f"{sum(files.values())} files ({counts})")
+    if report["truncated"]:
+        notes.append("part of the listing (GitHub truncated a very large subtree)")
+    return f"(Not listed: {'; '.join(notes)})" if notes else ""
+
+
+# ---------------------------
+# Compact Encoding
+# ---------------------------
+def _new_node():
+    return {"dirs": {}, "files": []}
+
+
+def _build_trie(entries):
+    root = _new_node()
+    for entry in entries:
+        parts = entry.path.split("/")
+        node = root
+        for part in parts[:-1]:
+            node = node["dirs"].setdefault(part, _new_node())
+        if entry.type == "tree":
+            node["dirs"].setdefault(parts[-1], _new_node())
+        elif entry.type == "blob":
+            node["files"].append(parts[-1])
+    return root
+
+
+def _ext(name):
+    return os.path.splitext(name)[1]
+
+
+def _ext_counts(node, counts=None):
+    counts = {} if counts is None else counts
+    for name in node["files"]:
+        ext = _ext(name) or name
+        counts[ext] = counts.get(ext, 0) + 1
+    for child in node["dirs"].values():
+        _ext_counts(child, counts)
+    return counts
+
+
+def _describe_counts(counts):
+    """
+    `412 *.py` for one extension, `30 files: 20 *.py, 10 *.md` otherwise.
+    """
+    def label(ext):
+        return f"*{ext}" if ext.startswith(".") else ext
+
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    if len(ranked) == 1:
+        ext, count = ranked[0]
+        return f"{count} {label(ext)}"
+    total = sum(counts.values())
+    shown = ", ".join(f"{count} {label(ext)}" for ext, count in ranked[:4])
+    if len(ranked) > 4:
+        shown += ", ..."
+    return f"{total} files: {shown}"
+
+
+def _render_files(files, indent, lines):
+    groups = {}
+    for name in sorted(files):
+        groups.setdefault(_ext(name), []).append(name)
+
+    for ext, names in sorted(groups.items()):
+        if ext and len(names) > 1:
+            stems = ", ".join(name[: -len(ext)] for name in names)
+            lines.append(f"{indent}*{ext}: {stems}")
+        else:
+            lines.extend(f"{indent}{name}" for name in names)
+
+
+def _render_dir(name, node, depth, max_depth, lines):
+    # Collapse chains like src/ -> main/ -> java/ into one line
+    while not node["files"] and len(node["dirs"]) == 1:
+        child_name, child = next(iter(node["dirs"].items()))
+        name, node = f"{name}/{child_name}", child
+
+    indent = "  " * depth
+    counts = _ext_counts(node)
+    total = sum(counts.values())
+
+    if len(counts) == 1 and total >= HOMOGENEOUS_MIN_FILES:
+        lines.append(f"{indent}{name}/ ({_describe_counts(counts)})")
+        return
+    if max_depth is not None and depth >= max_depth and (node["dirs"] or node["files"]):
+        lines.append(f"{indent}{name}/ ({_describe_counts(counts) if counts else 'empty'})")
+        return
+
+    lines.append(f"{indent}{name}/")
+    _render_children(node, depth + 1, max_depth, lines)
+
+
+def _render_children(node, depth, max_depth, lines):
+    for child_name, child in sorted(node["dirs"].items()):
+        _render_dir(child_name, child, depth, max_depth, lines)
+    _render_files(node["files"], "  " * depth, lines)
+
+
+def encode_tree(entries, max_depth=None, max_chars=None):
+    """
+    Renders tree entries as a compact indented trie.
+
+    `max_depth` summarizes directories nested deeper than that many levels as
+    counts. If the result is longer than `max_chars`, the depth is reduced
+    until it fits, and as a last resort the output is cut off.
+    """
+    root = _build_trie(entries)
+
+    depth = max_depth
+    while True:
+        lines = []
+        _render_children(root, 0, depth, lines)
+        text = "\n".join(lines)
+        if max_chars is None or len(text) <= max_chars:
+            return text
+        if depth is None:
+            depth = max((len(line) - len(line.lstrip(" "))) // 2 for line in lines)
+        if depth <= 0:
+            break
+        depth -= 1
+
+    # Keep whole lines only, leaving room for the marker
+    marker = "... (truncated)"
+    kept, size = [], 0
+    for line in lines:
+        if size + len(line) + 1 + len(marker) > max_chars:
+            break
+        kept.append(line)
+        size += len(line) + 1
+    return "\n".join(kept + [marker])[:max_chars]
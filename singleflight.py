@@ -0,0 +1,84 @@
+"""
+Process-wide single-flight request coalescing.
+
+Streamlit runs every session in the same process, so when several users
+analyze the same repo at once they would each fetch the same tree and send
+the same prompt. A SingleFlight runs one call per key at a time; callers that
+arrive while it is in flight wait for it and share its result (or exception).
+Nothing is cached after the call finishes.
+"""
+import hashlib
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Merges concurrent calls with the same key into one execution.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.merged = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.merged += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "merged": self.merged,
+                "in_flight": len(self._calls),
+            }
+
+
+def request_key(*parts):
+    """
+    Stable key for arbitrary request parts; secrets such as tokens are hashed
+    rather than kept around in the in-flight table.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# Shared by every session in this process
+TREE_FETCHES = SingleFlight("tree fetches")
+SUMMARIES = SingleFlight("key file summaries")
+LLM_CALLS = SingleFlight("LLM calls")
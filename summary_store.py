@@ -0,0 +1,172 @@
+"""
+Content-addressed summaries shared across repositories.
+
+File summaries are keyed by git blob SHA, so vendored libraries and
+copy-pasted modules are summarized once no matter how many repos contain
+them. Ingestion looks the SHAs up first and only downloads and summarizes
+content the store has never seen.
+"""
+import base64
+import os
+import posixpath
+import sqlite3
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from prompts import FILE_SUMMARY_PROMPT
+
+STORE_PATH = os.environ.get("SUMMARY_STORE_PATH") or os.path.join(
+    os.path.expanduser("~"), ".cache", "ai-super-agent", "summaries.sqlite3"
+)
+
+# Files the Analyzer is most likely to need, summarized first
+KEY_FILES = {
+    "readme.md", "readme.rst", "readme", "readme.txt", "setup.py", "pyproject.toml",
+    "package.json", "cargo.toml", "go.mod", "pom.xml", "build.gradle", "dockerfile",
+    "main.py", "app.py", "__main__.py", "manage.py", "index.js", "index.ts", "main.go",
+}
+SOURCE_EXTENSIONS = {
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".go", ".rs", ".java", ".kt", ".scala", ".rb",
+    ".php", ".c", ".h", ".cc", ".cpp", ".hpp", ".cs", ".swift", ".m", ".sh", ".sql",
+    ".md", ".rst", ".toml", ".yaml", ".yml", ".json", ".cfg", ".ini",
+}
+MAX_FILE_BYTES = 100_000
+MAX_PROMPT_CHARS = 12_000
+
+
+# ---------------------------
+# Store
+# ---------------------------
+class SummaryStore:
+    """
+    SQLite table of sha -> summary. Safe to share between threads; each call
+    opens its own connection.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "sha TEXT PRIMARY KEY, kind TEXT NOT NULL, summary TEXT NOT NULL, created REAL NOT NULL)"
+            )
+        # Selected files served from the store / newly summarized / failed
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, shas):
+        shas = list(set(shas))
+        found = {}
+        with self._connect() as db:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(shas), 500):
+                chunk = shas[i:i + 500]
+                rows = db.execute(
+                    f"SELECT sha, summary FROM summaries WHERE sha IN ({','.join('?' * len(chunk))})", chunk
+                )
+                found.update(rows)
+        return found
+
+    def put_many(self, kind, summaries):
+        if not summaries:
+            return
+        now = time.time()
+        with self._connect() as db:
+            db.executemany(
+                "INSERT OR IGNORE INTO summaries (sha, kind, summary, created) VALUES (?, ?, ?, ?)",
+                [(sha, kind, summary, now) for sha, summary in summaries.items()],
+            )
+
+    def count(self, hits=0, misses=0, failures=0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.failures += failures
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "failures": self.failures}
+
+
+# ---------------------------
+# Summarization Stage
+# ---------------------------
+def _priority(entry):
+    name = posixpath.basename(entry.path).lower()
+    return (name not in KEY_FILES, entry.path.count("/"), entry.path)
+
+
+def select_files(entries, max_files):
+    """
+    Picks up to `max_files` text/source blobs, key files and shallow paths first.
+    """
+    candidates = [
+        e for e in entries
+        if e.type == "blob"
+        and 0 < e.size <= MAX_FILE_BYTES
+        and (posixpath.splitext(e.path)[1].lower() in SOURCE_EXTENSIONS
+             or posixpath.basename(e.path).lower() in KEY_FILES)
+    ]
+    return sorted(candidates, key=_priority)[:max_files]
+
+
+def _summarize_blob(repo, entry, summarize, cancel):
+    """
+    One-line summary of `entry`, or None if it couldn't be fetched or summarized.
+    """
+    if cancel is not None and cancel.is_set():
+        raise CancelledError()
+    try:
+        return _fetch_and_summarize(repo, entry, summarize)
+    except CancelledError:
+        raise
+    except Exception:
+        # Summaries only enrich the context; a failed file is left out
+        return None
+
+
+def _fetch_and_summarize(repo, entry, summarize):
+    blob = repo.get_git_blob(entry.sha)
+    text = base64.b64decode(blob.content).decode("utf-8", "replace")
+    if len(text) > MAX_PROMPT_CHARS:
+        text = text[:MAX_PROMPT_CHARS] + "\n... (truncated)"
+    # The prompt holds only the content, so identical files in other repos
+    # produce identical prompts (and share in-flight LLM calls)
+    summary = summarize(FILE_SUMMARY_PROMPT.render("", file_contents=text)).content
+    # Digests store one "path: summary" line per file
+    return " ".join(summary.split())
+
+
+def summarize_repo(repo, entries, summarize, store, max_files=20, max_workers=8, cancel=None):
+    """
+    Returns a digest ("path: summary" lines) for the most relevant files.
+
+    Selected files are looked up in `store` by blob SHA; only the misses are
+    downloaded and sent to `summarize(prompt)`, and their summaries written
+    back. Setting the `cancel` event stops before the next download.
+    """
+    selected = select_files(entries, max_files)
+    if not selected:
+        return ""
+
+    known = store.get_many(e.sha for e in selected)
+    summaries = {e.path: known[e.sha] for e in selected if e.sha in known}
+    missing = [e for e in selected if e.sha not in known]
+
+    fresh = {}
+    if missing:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(lambda e: _summarize_blob(repo, e, summarize, cancel), missing))
+        fresh = {e: summary for e, summary in zip(missing, results) if summary is not None}
+        store.put_many("blob", {e.sha: summary for e, summary in fresh.items()})
+        summaries.update((e.path, summary) for e, summary in fresh.items())
+    store.count(hits=len(selected) - len(missing), misses=len(fresh), failures=len(missing) - len(fresh))
+
+    return "\n".join(f"{path}: {summaries[path]}" for path in sorted(summaries))
@@ -0,0 +1,48 @@
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import agents
+
+
+class HeadRepo:
+    """
+    A repo whose default branch head is at `tree_sha`.
+    """
+
+    default_branch = "main"
+    full_name = "owner/repo"
+
+    def __init__(self, tree_sha):
+        self.tree_sha = tree_sha
+
+    def get_branch(self, name):
+        tree = SimpleNamespace(sha=self.tree_sha)
+        return SimpleNamespace(commit=SimpleNamespace(commit=SimpleNamespace(tree=tree)))
+
+
+def prefetched(repo, tree_sha, repo_tree):
+    future = Future()
+    future.set_result((repo, tree_sha, [], repo_tree))
+    return future
+
+
+def ingest(monkeypatch, prefetch, repo):
+    monkeypatch.setattr(agents, "shared_digest", lambda *args: "prefetched digest")
+    monkeypatch.setattr(agents, "shared_ingest", lambda *args: ("fresh tree", "fresh digest"))
+    return agents.ingest_prefetched(prefetch, lambda: repo, None, None, None)
+
+
+def test_current_prefetch_is_reused(monkeypatch):
+    repo = HeadRepo("abc")
+    prefetch = prefetched(repo, "abc", "prefetched tree")
+    assert ingest(monkeypatch, prefetch, repo) == ("prefetched tree", "prefetched digest")
+
+
+def test_stale_or_failed_prefetch_is_ingested_again(monkeypatch):
+    repo = HeadRepo("new")
+    assert ingest(monkeypatch, prefetched(repo, "old", "prefetched tree"), repo) == ("fresh tree", "fresh digest")
+
+    failed = Future()
+    failed.set_exception(ConnectionError("GitHub unreachable"))
+    assert ingest(monkeypatch, failed, repo) == ("fresh tree", "fresh digest")
+    assert ingest(monkeypatch, None, repo) == ("fresh tree", "fresh digest")
@@ -0,0 +1,42 @@
+from code_blocks import changed_files, parse_code_blocks
+from validation import failed, missing_paths
+
+
+def block(header, body="print('hi')", language="python"):
+    return f"{header}\n```{language}\n{body}\n```\n"
+
+
+def test_header_variants_give_the_path():
+    for header in (
+        "File: src/app.py",
+        "**File:** `src/app.py`",
+        "**File**: `src/app.py`",
+        "**File:**`src/app.py`",
+        "### `src/app.py`",
+        "1. **src/app.py**",
+        "__Path:__ src/app.py",
+    ):
+        assert [b.path for b in parse_code_blocks(block(header))] == ["src/app.py"], header
+
+
+def test_path_comment_on_first_line():
+    text = block("Here is the code:", body="# pkg/mod.py\nVALUE = 1")
+    assert parse_code_blocks(text)[0].path == "pkg/mod.py"
+
+
+def test_unsafe_and_missing_paths():
+    text = block("File: ../outside.py") + block("Some prose.") + block("File: /etc/passwd", language="")
+    assert [b.path for b in parse_code_blocks(text)] == [None, None, None]
+
+
+def test_changed_files_last_block_wins():
+    text = block("File: a.py", body="A = 1") + block("File: b.py", body="B = 1") + block("File: a.py", body="A = 2")
+    assert changed_files(text) == {"a.py": "A = 2\n", "b.py": "B = 1\n"}
+
+
+def test_blocks_without_path_are_reported():
+    text = block("File: a.py") + block("Run this:", body="pip install thing", language="bash")
+    results = missing_paths(parse_code_blocks(text))
+    assert [r.name for r in failed(results)] == ["file paths"]
+    assert "block 2 (bash): pip install thing" in results[0].output
+    assert missing_paths(parse_code_blocks(block("File: a.py"))) == []
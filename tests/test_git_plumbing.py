@@ -0,0 +1,86 @@
+import os
+import subprocess
+
+from git_plumbing import BareMirror, commit_and_push
+
+GIT_ENV = {
+    **os.environ,
+    "GIT_AUTHOR_NAME": "test", "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test", "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+def git(cwd, *args):
+    return subprocess.run(
+        ["git", *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def make_origin(tmp_path):
+    """
+    Bare origin with a regular file, a nested module, an executable and a symlink.
+    """
+    origin = tmp_path / "origin.git"
+    work = tmp_path / "work"
+    git(tmp_path, "init", "-q", "--bare", "-b", "main", str(origin))
+    git(origin, "config", "uploadpack.allowFilter", "true")
+    git(tmp_path, "init", "-q", "-b", "main", str(work))
+    (work / "pkg").mkdir()
+    (work / "README.md").write_text("readme\n")
+    (work / "pkg" / "mod.py").write_text("VALUE = 1\n")
+    (work / "run.sh").write_text("echo old\n")
+    (work / "run.sh").chmod(0o755)
+    os.symlink("README.md", work / "link")
+    git(work, "add", "-A")
+    git(work, "commit", "-q", "-m", "initial")
+    git(work, "push", "-q", str(origin), "main")
+    return origin
+
+
+def ls_tree(origin, ref):
+    """
+    Maps path -> (mode, sha) for every file in `ref`.
+    """
+    entries = {}
+    for line in git(origin, "ls-tree", "-r", ref).splitlines():
+        meta, path = line.split("\t")
+        mode, _, sha = meta.split()
+        entries[path] = (mode, sha)
+    return entries
+
+
+def test_commit_and_push_to_bare_origin(tmp_path):
+    origin = make_origin(tmp_path)
+    mirror = BareMirror(f"file://{origin}", str(tmp_path / "mirror"))
+    files = {
+        "pkg/mod.py": "VALUE = 2\n",
+        "pkg/new/deep.py": "DEEP = True\n",
+        "run.sh": "echo new\n",
+        "link": "no longer a symlink\n",
+    }
+    commit = commit_and_push(mirror, files, "feature", "Apply changes")
+
+    assert git(origin, "rev-parse", "feature") == commit
+    assert git(origin, "rev-parse", "feature^") == git(origin, "rev-parse", "main")
+    assert git(origin, "log", "-1", "--format=%s", "feature") == "Apply changes"
+
+    before, after = ls_tree(origin, "main"), ls_tree(origin, "feature")
+    assert set(after) == set(before) | {"pkg/new/deep.py"}
+    # Untouched files reuse the existing blobs
+    assert after["README.md"] == before["README.md"]
+    # The executable bit survives; a symlink overwritten with content becomes a file
+    assert after["run.sh"][0] == "100755"
+    assert before["link"][0] == "120000"
+    assert after["link"][0] == "100644"
+    assert after["pkg/new/deep.py"][0] == "100644"
+    for path, content in files.items():
+        assert git(origin, "show", f"feature:{path}") == content.strip()
+
+
+def test_mirror_holds_no_blobs(tmp_path):
+    origin = make_origin(tmp_path)
+    mirror = BareMirror(f"file://{origin}", str(tmp_path / "mirror"))
+    commit_and_push(mirror, {"pkg/mod.py": "VALUE = 3\n"}, "feature", "Apply changes")
+
+    missing = git(mirror.path, "rev-list", "--objects", "--missing=print", "refs/remotes/origin/main")
+    assert "?" in missing
@@ -0,0 +1,10 @@
+from benchmarks.loadtest import percentile
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(10, 0, -1))
+    assert percentile(values, 50) == 5
+    assert percentile(values, 95) == 10
+    assert percentile(values, 10) == 1
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
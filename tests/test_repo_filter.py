@@ -0,0 +1,58 @@
+from repo_filter import RepoFilter
+
+
+def test_gitignore_patterns():
+    repo_filter = RepoFilter()
+    repo_filter.add_gitignore("", "*.log\n/build-output/\nsecrets/*.txt\n!keep.log\n")
+    assert repo_filter.exclusion_reason("app.log") == "gitignore"
+    assert repo_filter.exclusion_reason("src/debug.log") == "gitignore"
+    assert repo_filter.exclusion_reason("keep.log") is None
+    assert repo_filter.exclusion_reason("build-output", is_dir=True) == "gitignore"
+    assert repo_filter.exclusion_reason("src/build-output", is_dir=True) is None
+    assert repo_filter.exclusion_reason("build-output") is None
+    assert repo_filter.exclusion_reason("secrets/key.txt") == "gitignore"
+    assert repo_filter.exclusion_reason("src/secrets/key.txt") is None
+
+
+def test_nested_gitignore_is_relative_to_its_directory():
+    repo_filter = RepoFilter()
+    repo_filter.add_gitignore("web", "/static/\n")
+    assert repo_filter.exclusion_reason("web/static", is_dir=True) == "gitignore"
+    assert repo_filter.exclusion_reason("static", is_dir=True) is None
+    assert repo_filter.exclusion_reason("web/app/static", is_dir=True) is None
+
+
+def test_anchored_directory_attribute_only_matches_at_its_root():
+    repo_filter = RepoFilter()
+    repo_filter.add_gitattributes("", "docs/** linguist-generated\n")
+    assert repo_filter.exclusion_reason("docs", is_dir=True) == "generated"
+    assert repo_filter.exclusion_reason("docs/x.py") == "generated"
+    # A nested directory with the same name is a different path
+    assert repo_filter.exclusion_reason("src/pkg/docs", is_dir=True) is None
+    assert repo_filter.exclusion_reason("src/pkg/docs/x.py") is None
+
+
+def test_anchored_override_keeps_heuristics_for_nested_directories():
+    repo_filter = RepoFilter()
+    repo_filter.add_gitattributes("", "vendor/** -linguist-vendored\n")
+    assert repo_filter.exclusion_reason("vendor", is_dir=True) is None
+    assert repo_filter.exclusion_reason("vendor/lib.go") is None
+    assert repo_filter.exclusion_reason("src/vendor", is_dir=True) == "vendored"
+
+
+def test_unanchored_directory_attribute_matches_at_any_depth():
+    repo_filter = RepoFilter()
+    repo_filter.add_gitattributes("", "**/fixtures/** linguist-vendored\n")
+    assert repo_filter.exclusion_reason("fixtures", is_dir=True) == "vendored"
+    assert repo_filter.exclusion_reason("tests/fixtures", is_dir=True) == "vendored"
+    assert repo_filter.exclusion_reason("tests/fixtures/data.json") == "vendored"
+
+
+def test_heuristics_and_size_limit():
+    repo_filter = RepoFilter(max_file_size=100)
+    assert repo_filter.exclusion_reason("node_modules", is_dir=True) == "vendored"
+    assert repo_filter.exclusion_reason("package-lock.json") == "lockfile"
+    assert repo_filter.exclusion_reason("static/app.min.js") == "generated"
+    assert repo_filter.exclusion_reason("logo.png") == "binary"
+    assert repo_filter.exclusion_reason("big.py", size=101) == "too large"
+    assert repo_filter.exclusion_reason("small.py", size=100) is None
@@ -0,0 +1,55 @@
+from repo_tree import TreeEntry, encode_tree
+
+
+def blobs(*paths):
+    return [TreeEntry(path, "blob", 10, "sha") for path in paths]
+
+
+ENTRIES = blobs(
+    "src/main/java/App.java", "src/main/java/Util.java", "README.md",
+    "pkg/a.py", "pkg/b.py", "pkg/notes.md", "deep/a/b/c.py", "deep/a/x.py",
+    *(f"data/f{i}.json" for i in range(12)),
+)
+
+
+def test_single_child_chains_are_collapsed():
+    lines = encode_tree(ENTRIES).splitlines()
+    assert "src/main/java/" in lines
+    assert "deep/a/" in lines
+
+
+def test_files_are_grouped_by_extension():
+    lines = encode_tree(ENTRIES).splitlines()
+    assert "  *.py: a, b" in lines
+    assert "  notes.md" in lines
+    assert "  *.java: App, Util" in lines
+    assert "README.md" in lines
+
+
+def test_homogeneous_directories_are_counted():
+    lines = encode_tree(ENTRIES).splitlines()
+    assert "data/ (12 *.json)" in lines
+    assert not any("f0" in line for line in lines)
+
+
+def test_max_depth_summarizes_deeper_directories():
+    lines = encode_tree(ENTRIES, max_depth=1).splitlines()
+    assert "  b/ (1 *.py)" in lines
+    assert "    c.py" not in lines
+
+
+def test_depth_is_reduced_to_fit_the_budget():
+    shallow = encode_tree(ENTRIES, max_depth=0)
+    text = encode_tree(ENTRIES, max_chars=len(shallow))
+    assert text == shallow
+    assert "deep/a/ (2 *.py)" in text.splitlines()
+
+
+def test_truncation_keeps_whole_lines_within_budget():
+    full_lines = encode_tree(ENTRIES, max_depth=0).splitlines()
+    for max_chars in (5, 15, 30, 50, 80):
+        text = encode_tree(ENTRIES, max_chars=max_chars)
+        assert len(text) <= max_chars
+        *kept, marker = text.splitlines()
+        assert "... (truncated)".startswith(marker)
+        assert all(line in full_lines for line in kept)
@@ -0,0 +1,120 @@
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import pytest
+
+from agents import _shared
+from singleflight import SingleFlight
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.01)
+
+
+def run_together(flight, callers, fn):
+    """
+    Starts `callers` calls of `fn` under one key and holds the first until the
+    others have joined it. Returns their futures.
+    """
+    release = threading.Event()
+    calls = []
+
+    def blocking():
+        calls.append(1)
+        release.wait()
+        return fn()
+
+    executor = ThreadPoolExecutor(callers)
+    futures = [executor.submit(flight.do, "key", blocking) for _ in range(callers)]
+    wait_for(lambda: flight.stats()["merged"] == callers - 1)
+    release.set()
+    executor.shutdown()
+    return futures, calls
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    result = object()
+    futures, calls = run_together(flight, 5, lambda: result)
+
+    assert all(future.result() is result for future in futures)
+    assert len(calls) == 1
+    assert flight.stats() == {"executed": 1, "merged": 4, "in_flight": 0}
+
+
+def test_waiters_get_the_leaders_exception():
+    flight = SingleFlight("test")
+    error = TimeoutError("model timed out")
+
+    def fail():
+        raise error
+
+    futures, calls = run_together(flight, 3, fail)
+    assert all(future.exception() is error for future in futures)
+    assert len(calls) == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_results_are_not_cached():
+    flight = SingleFlight("test")
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.stats() == {"executed": 2, "merged": 0, "in_flight": 0}
+
+
+def shared_call(flight, started, release):
+    def walk(cancel):
+        started.set()
+        release.wait()
+        if cancel.is_set():
+            raise CancelledError()
+        return "tree"
+
+    def call(cancel):
+        return _shared(flight, "key", cancel, walk, cancel)
+
+    return call
+
+
+def test_waiter_retries_after_a_cancelled_leader():
+    flight = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+    call = shared_call(flight, started, release)
+    leader_cancel, waiter_cancel = threading.Event(), threading.Event()
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(call, leader_cancel)
+        started.wait(5)
+        waiter = executor.submit(call, waiter_cancel)
+        wait_for(lambda: flight.stats()["merged"] == 1)
+        leader_cancel.set()
+        release.set()
+
+        with pytest.raises(CancelledError):
+            leader.result()
+        assert waiter.result() == "tree"
+    assert flight.stats() == {"executed": 2, "merged": 1, "in_flight": 0}
+
+
+def test_cancelled_waiter_does_not_retry():
+    flight = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+    call = shared_call(flight, started, release)
+    cancel = threading.Event()
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(call, cancel)
+        started.wait(5)
+        waiter = executor.submit(call, cancel)
+        wait_for(lambda: flight.stats()["merged"] == 1)
+        cancel.set()
+        release.set()
+
+        for future in (leader, waiter):
+            with pytest.raises(CancelledError):
+                future.result()
+    assert flight.stats()["executed"] == 1
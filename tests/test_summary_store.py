@@ -0,0 +1,73 @@
+import base64
+import hashlib
+from types import SimpleNamespace
+
+from repo_tree import TreeEntry
+from summary_store import SummaryStore, summarize_repo
+
+
+class FakeRepo:
+    """
+    Serves blobs for `files` ({path: text}); blob SHAs are content hashes.
+    """
+
+    def __init__(self, files):
+        self.blobs = {sha(text): text for text in files.values()}
+        self.entries = [TreeEntry(path, "blob", len(text), sha(text)) for path, text in files.items()]
+        dirs = {path.rsplit("/", 1)[0] for path in files if "/" in path}
+        self.entries += [TreeEntry(d, "tree", None, sha("tree " + d)) for d in dirs]
+
+    def get_git_blob(self, blob_sha):
+        return SimpleNamespace(content=base64.b64encode(self.blobs[blob_sha].encode()).decode())
+
+
+def sha(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def summarizer(fail_on=None):
+    calls = []
+
+    def summarize(prompt):
+        calls.append(prompt)
+        if fail_on and fail_on in prompt:
+            raise TimeoutError("model timed out")
+        return SimpleNamespace(content=f"summary {len(calls)}")
+
+    return summarize, calls
+
+
+def test_failed_file_is_left_out_of_the_digest(tmp_path):
+    store = SummaryStore(str(tmp_path / "summaries.sqlite3"))
+    repo = FakeRepo({"README.md": "readme", "pkg/a.py": "A = 1", "pkg/b.py": "B = 2"})
+    summarize, _ = summarizer(fail_on="B = 2")
+
+    digest = summarize_repo(repo, repo.entries, summarize, store)
+
+    assert "README.md: " in digest
+    assert "pkg/a.py: " in digest
+    assert "pkg/b.py" not in digest
+    assert store.stats() == {"hits": 0, "misses": 2, "failures": 1}
+
+
+def test_failed_file_is_retried_next_time(tmp_path):
+    store = SummaryStore(str(tmp_path / "summaries.sqlite3"))
+    repo = FakeRepo({"pkg/a.py": "A = 1", "pkg/b.py": "B = 2"})
+    summarize_repo(repo, repo.entries, summarizer(fail_on="B = 2")[0], store)
+
+    summarize, calls = summarizer()
+    digest = summarize_repo(repo, repo.entries, summarize, store)
+    assert len(calls) == 1
+    assert "pkg/b.py: " in digest
+
+
+def test_hits_count_selected_files_only(tmp_path):
+    store = SummaryStore(str(tmp_path / "summaries.sqlite3"))
+    repo = FakeRepo({"README.md": "readme", "pkg/a.py": "A = 1", "pkg/sub/b.py": "B = 2"})
+    summarize_repo(repo, repo.entries, summarizer()[0], store)
+
+    summarize, calls = summarizer()
+    summarize_repo(repo, repo.entries, summarize, store)
+    assert calls == []
+    # Three files served from the store
+    assert store.stats() == {"hits": 3, "misses": 3, "failures": 0}
@@ -0,0 +1,100 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from validation import failed, impacted_tests, validate_changes
+
+
+def write(root, files):
+    for path, content in files.items():
+        full_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def test_impacted_tests_match_import_forms(tmp_path):
+    write(tmp_path, {
+        "pkg/__init__.py": "",
+        "pkg/mod.py": "X = 1\n",
+        "tests/test_import.py": "import pkg.mod\n",
+        "tests/test_from_module.py": "from pkg.mod import X\n",
+        "tests/test_from.py": "from pkg import mod\n",
+        "tests/test_from_list.py": "from pkg import (\n    other,\n    mod as m,\n)\n",
+        "tests/test_import_list.py": "import os, pkg.mod as m\n",
+        "tests/test_unrelated.py": "from pkg import other\nimport modular, pkg.other\n",
+    })
+    assert impacted_tests(str(tmp_path), ["pkg/mod.py"]) == [
+        "tests/test_from.py", "tests/test_from_list.py", "tests/test_from_module.py",
+        "tests/test_import.py", "tests/test_import_list.py",
+    ]
+    write(tmp_path, {"app.py": "", "tests/test_app.py": "import time, app\n"})
+    assert impacted_tests(str(tmp_path), ["app.py"]) == ["tests/test_app.py"]
+
+
+def test_lint_fails_only_on_runtime_errors(tmp_path):
+    write(tmp_path, {
+        "clean.py": "import os\n\nVALUE = 1\n",
+        "broken.py": "def f():\n    return missing_name\n",
+    })
+    results = validate_changes(str(tmp_path), ["clean.py"], run_tests=False)
+    assert not failed(results)
+
+    results = validate_changes(str(tmp_path), ["clean.py", "broken.py"], run_tests=False)
+    assert [r.name for r in failed(results)] == ["lint"]
+    assert "missing_name" in failed(results)[0].output
+
+
+def test_syntax_errors_are_reported(tmp_path):
+    write(tmp_path, {"bad.py": "def f(:\n"})
+    results = validate_changes(str(tmp_path), ["bad.py"], run_tests=False)
+    assert "syntax bad.py" in [r.name for r in failed(results)]
+
+
+def test_checks_do_not_see_server_secrets(tmp_path, monkeypatch):
+    monkeypatch.setenv("XAI_API_KEY", "secret")
+    write(tmp_path, {
+        "app.py": "VALUE = 1\n",
+        "test_app.py": "import os\n\nimport app\n\n\ndef test_env():\n    assert 'XAI_API_KEY' not in os.environ\n",
+    })
+    results = validate_changes(str(tmp_path), ["app.py"])
+    assert "tests" in [r.name for r in results]
+    assert not failed(results)
+
+
+def test_queued_checks_do_not_use_up_their_budget(tmp_path, monkeypatch):
+    import validation
+
+    # One worker, so the sessions' checks run one after another
+    monkeypatch.setattr(validation, "WORKERS", 1)
+    monkeypatch.setattr(validation, "_pool", None)
+    monkeypatch.setattr(validation, "_TIMEOUT_GRACE", 0)
+    write(tmp_path, {
+        "app.py": "VALUE = 1\n",
+        "test_app.py": "import time\n\nimport app\n\n\ndef test_slow():\n    time.sleep(0.5)\n",
+    })
+    sessions = 4
+    try:
+        with ThreadPoolExecutor(sessions) as executor:
+            runs = [executor.submit(validate_changes, str(tmp_path), ["app.py"], timeout=3) for _ in range(sessions)]
+            results = [run.result() for run in runs]
+    finally:
+        pool = validation._pool
+        if pool:
+            pool[0].shutdown()
+    for session_results in results:
+        assert [r.name for r in session_results] == ["lint", "syntax app.py", "tests"]
+        assert not failed(session_results)
+
+
+def test_checks_leave_the_worktree_unchanged(tmp_path):
+    write(tmp_path, {
+        "app.py": "VALUE = 1\n",
+        "test_app.py": (
+            "import os\n\nimport app\n\n\ndef test_home():\n"
+            "    assert os.path.realpath(os.environ['HOME']) != os.path.realpath(os.getcwd())\n"
+            "    open(os.path.expanduser('~/.tool-state'), 'w').close()\n"
+        ),
+    })
+    results = validate_changes(str(tmp_path), ["app.py"])
+    assert not failed(results)
+    assert sorted(os.listdir(tmp_path)) == ["app.py", "test_app.py"]
@@ -0,0 +1,340 @@
+"""
+Pre-push validation of generated changes in a worktree.
+
+Runs, concurrently in a process pool:
+- a syntax check per changed Python file (AST parse + byte-compile),
+- a linter over the changed Python files (ruff, else pyflakes, if installed),
+- the tests impacted by the changed modules (pytest, if installed).
+
+Every check has a time budget. The formatted report is what goes back to the
+Coder for a repair round.
+"""
+import ast
+import importlib.util
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+CheckResult = namedtuple("CheckResult", ["name", "ok", "output", "seconds"])
+
+CHECK_TIMEOUT = 60
+# Extra wait for a check's result beyond its budget; subprocess checks enforce
+# the budget themselves, this catches a worker that doesn't return
+_TIMEOUT_GRACE = 5
+_SKIP_DIRS = {".git", "node_modules", ".venv", "venv", "__pycache__", ".tox", "build", "dist"}
+
+# The only server environment passed to checks: they run generated code and the
+# target repo's conftest, which must not see API keys or tokens
+_SAFE_ENV = ("PATH", "LANG", "LC_ALL", "LC_CTYPE", "TZ", "SYSTEMROOT", "VIRTUAL_ENV", "CONDA_PREFIX")
+
+# pyflakes messages matching ruff's E9,F63,F7,F82: errors at runtime, not style
+_RUNTIME_ERRORS = (
+    "UndefinedName", "UndefinedExport", "UndefinedLocal",
+    "IsLiteral", "AssertTuple", "IfTuple", "InvalidPrintSyntax",
+    "BreakOutsideLoop", "ContinueOutsideLoop", "YieldOutsideFunction", "ReturnOutsideFunction",
+    "DefaultExceptNotLast",
+)
+
+
+# ---------------------------
+# Checks (run in worker processes)
+# ---------------------------
+def _check_syntax(root, path):
+    started = time.perf_counter()
+    try:
+        with open(os.path.join(root, path), "rb") as f:
+            source = f.read()
+        ast.parse(source, filename=path)
+        compile(source, path, "exec", dont_inherit=True)
+        return CheckResult(f"syntax {path}", True, "", time.perf_counter() - started)
+    except (SyntaxError, ValueError) as e:
+        return CheckResult(f"syntax {path}", False, f"{path}:{getattr(e, 'lineno', '?')}: {e}", time.perf_counter() - started)
+
+
+def _check_env(home):
+    env = {name: os.environ[name] for name in _SAFE_ENV if name in os.environ}
+    # Keep user config (~/.netrc, ~/.gitconfig, ~/.config) out of reach too, and
+    # out of the worktree, whose files may get committed
+    env.update(HOME=home, PYTHONDONTWRITEBYTECODE="1")
+    return env
+
+
+def _run(name, command, root, timeout, ok_codes=(0,)):
+    started = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory(prefix="validation-home-") as home:
+            proc = subprocess.run(
+                command, cwd=root, env=_check_env(home), capture_output=True, text=True, timeout=timeout
+            )
+    except subprocess.TimeoutExpired:
+        return CheckResult(name, False, f"timed out after {timeout}s", time.perf_counter() - started)
+    output = (proc.stdout + proc.stderr).strip()
+    return CheckResult(name, proc.returncode in ok_codes, output, time.perf_counter() - started)
+
+
+def _check_lint(root, paths, timeout):
+    if importlib.util.find_spec("ruff"):
+        # Only errors that break code at runtime, not style
+        command = [sys.executable, "-m", "ruff", "check", "--no-cache", "--select", "E9,F63,F7,F82", *paths]
+    elif importlib.util.find_spec("pyflakes"):
+        started = time.perf_counter()
+        errors = _pyflakes_errors(root, paths)
+        return CheckResult("lint", not errors, "\n".join(errors), time.perf_counter() - started)
+    else:
+        return CheckResult("lint", True, "skipped: neither ruff nor pyflakes is installed", 0.0)
+    return _run("lint", command, root, timeout)
+
+
+def _pyflakes_errors(root, paths):
+    """
+    pyflakes findings limited to the same runtime errors ruff is asked for.
+    """
+    from pyflakes import checker, messages
+
+    kinds = tuple(getattr(messages, name) for name in _RUNTIME_ERRORS if hasattr(messages, name))
+    errors = []
+    for path in paths:
+        with open(os.path.join(root, path), "rb") as f:
+            source = f.read()
+        try:
+            tree = ast.parse(source, filename=path)
+        except (SyntaxError, ValueError) as e:
+            errors.append(f"{path}:{getattr(e, 'lineno', '?')}: {e}")
+            continue
+        found = [m for m in checker.Checker(tree, filename=path).messages if isinstance(m, kinds)]
+        errors += [str(m) for m in sorted(found, key=lambda m: (m.lineno, m.col))]
+    return errors
+
+
+def _check_tests(root, tests, timeout):
+    if not importlib.util.find_spec("pytest"):
+        return CheckResult("tests", True, "skipped: pytest is not installed", 0.0)
+    # Exit code 5 means no tests were collected
+    return _run("tests", [sys.executable, "-m", "pytest", "-q", "-x", "--no-header", "-p", "no:cacheprovider", *tests], root, timeout, ok_codes=(0, 5))
+
+
+# ---------------------------
+# Impacted Tests
+# ---------------------------
+def _is_test_file(path):
+    name = os.path.basename(path)
+    return name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+def _module_names(path):
+    """
+    Names a test might import a changed file by: `pkg.sub.mod`, `sub.mod`, `mod`.
+    """
+    parts = path[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return {".".join(parts[i:]) for i in range(len(parts))} - {""}
+
+
+_FROM_IMPORT = re.compile(r"^\s*from\s+([\w.]+)\s+import\s+(\([^)]*\)|[^\n#]*)", re.MULTILINE)
+_IMPORT = re.compile(r"^\s*import\s+([^\n#;]+)", re.MULTILINE)
+
+
+def _imports_module(source, modules):
+    """
+    True if `source` imports one of `modules` (or a submodule) with a plain
+    `import`, anywhere in a list such as `import os, pkg.mod as m`.
+    """
+    for match in _IMPORT.finditer(source):
+        for name in match.group(1).split(","):
+            words = name.split()
+            if not words:
+                continue
+            parts = words[0].split(".")
+            if any(".".join(parts[:i]) in modules for i in range(1, len(parts) + 1)):
+                return True
+    return False
+
+
+def _imports_from_package(source, modules):
+    """
+    True if `source` imports one of `modules` as `from <package> import <module>`.
+    """
+    for match in _FROM_IMPORT.finditer(source):
+        package = match.group(1)
+        for name in match.group(2).strip("()").split(","):
+            words = name.split()
+            if words and f"{package}.{words[0]}" in modules:
+                return True
+    return False
+
+
+def impacted_tests(root, changed):
+    """
+    Changed test files plus existing tests that import a changed module.
+    """
+    modules = set()
+    for path in changed:
+        if path.endswith(".py") and not _is_test_file(path):
+            modules |= _module_names(path)
+    tests = {path for path in changed if _is_test_file(path)}
+    if not modules:
+        return sorted(tests)
+
+    names = "|".join(re.escape(m) for m in sorted(modules, key=len, reverse=True))
+    from_imports = re.compile(rf"^\s*from\s+(?:{names})(?:\.|\s)", re.MULTILINE)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS]
+        for filename in filenames:
+            path = os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, "/")
+            if not _is_test_file(path) or path in tests:
+                continue
+            try:
+                with open(os.path.join(root, path), encoding="utf-8", errors="replace") as f:
+                    source = f.read()
+            except OSError:
+                continue
+            if from_imports.search(source) or _imports_module(source, modules) or _imports_from_package(source, modules):
+                tests.add(path)
+    return sorted(tests)
+
+
+# ---------------------------
+# Worker Pool
+# ---------------------------
+# Shared by every validation in this process: forkserver workers re-import the
+# parent's main module when they start, which is too slow to pay per call
+WORKERS = os.cpu_count() or 1
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class _WorkerSlots:
+    """
+    One slot per pool worker. A check is submitted only once it holds a slot,
+    so it starts right away and its budget doesn't include time spent queued
+    behind other sessions' checks. The slot is freed when the check finishes.
+    """
+
+    def __init__(self, count):
+        self._free = count
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._free > 0)
+            self._free -= 1
+
+    def release(self, _future=None):
+        with self._cond:
+            self._free += 1
+            self._cond.notify()
+
+
+def _shared_pool():
+    """
+    Returns the (pool, slots) pair, starting the pool on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a multi-threaded server (Streamlit) can deadlock the child
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else None
+            context = multiprocessing.get_context(start_method)
+            if start_method == "forkserver":
+                context.set_forkserver_preload([__name__])
+            _pool = (ProcessPoolExecutor(max_workers=WORKERS, mp_context=context), _WorkerSlots(WORKERS))
+        return _pool
+
+
+def _discard_pool(pool):
+    """
+    Drops a broken pool (a worker died, failing all its checks); the next call
+    starts a fresh one. A pool that merely has a slow check is kept.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool[0] is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+# ---------------------------
+# Pipeline
+# ---------------------------
+def validate_changes(root, changed, timeout=CHECK_TIMEOUT, run_tests=True):
+    """
+    Validates the `changed` repo-relative paths under `root`. Returns a list
+    of CheckResults; checks that overrun `timeout` are reported as failures.
+    Set `run_tests=False` when the target repo's dependencies aren't installed.
+    """
+    python_files = [p for p in changed if p.endswith(".py") and os.path.isfile(os.path.join(root, p))]
+    if not python_files:
+        return []
+
+    checks = [(f"syntax {path}", _check_syntax, (root, path)) for path in python_files]
+    checks.append(("lint", _check_lint, (root, python_files, timeout)))
+    tests = impacted_tests(root, python_files) if run_tests else []
+    if tests:
+        checks.append(("tests", _check_tests, (root, tests, timeout)))
+
+    pool, slots = _shared_pool()
+    submitted = []
+    try:
+        for name, check, args in checks:
+            slots.acquire()
+            try:
+                future = pool.submit(check, *args)
+            except BaseException:
+                slots.release()
+                raise
+            future.add_done_callback(slots.release)
+            submitted.append((name, future, time.monotonic() + timeout + _TIMEOUT_GRACE))
+
+        results = []
+        for name, future, deadline in submitted:
+            try:
+                results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeoutError:
+                # Left running: its slot comes back when it finishes
+                results.append(CheckResult(name, False, f"timed out after {timeout}s", float(timeout)))
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    return sorted(results, key=lambda r: r.name)
+
+
+def missing_paths(blocks):
+    """
+    A failed check listing the code blocks without a file path: they aren't
+    written anywhere, so the Coder has to label them for the change to apply.
+    """
+    unnamed = [(i, block) for i, block in enumerate(blocks, 1) if not block.path]
+    if not unnamed:
+        return []
+    lines = [f"{len(unnamed)} code block(s) have no `File: path/to/file` line and were not applied:"]
+    for i, block in unnamed:
+        first_line = next((line.strip() for line in block.content.splitlines() if line.strip()), "(empty)")
+        lines.append(f"- block {i} ({block.language or 'no language'}): {first_line[:120]}")
+    return [CheckResult("file paths", False, "\n".join(lines), 0.0)]
+
+
+def failed(results):
+    return [r for r in results if not r.ok]
+
+
+def format_report(results, max_output=4000):
+    """
+    Plain-text summary of failed checks, for the UI and the repair prompt.
+    """
+    lines = []
+    for result in failed(results):
+        output = result.output
+        if len(output) > max_output:
+            output = output[:max_output] + "\n... (output truncated)"
+        lines.append(f"[{result.name}] FAILED ({result.seconds:.1f}s)\n{output}")
+    return "\n\n".join(lines)